@@ -0,0 +1,318 @@
+from fastapi import HTTPException
+import json
+import logging
+import os
+import threading
+import time
+
+from utils import VOLUME_PATH
+
+logger = logging.getLogger(__name__)
+
+# 호스트 목록 예시 (MOAI_DOCKER_HOSTS 환경 변수, JSON)
+# [
+#   {"name": "gpu1", "base_url": "unix:///var/run/docker.sock", "address": "192.168.100.40", "gpu_slots": 1, "local": true},
+#   {"name": "gpu2", "base_url": "tcp://192.168.100.41:2375", "address": "192.168.100.41",
+#    "volume_path": "/data/MOAI/Project", "gpus": ["0", "1", "2", "3"], "gpu_slots": 2}
+# ]
+# base_url을 생략하면 docker.from_env()와 같은 방식으로 DOCKER_HOST 등을 사용한다.
+# volume_path는 그 호스트에서 /moai로 마운트할 프로젝트 볼륨 경로다. (생략 시 VOLUME_PATH)
+# gpus를 주면 gpu_slots개의 슬롯으로 나눠 슬롯마다 다른 GPU를 할당한다.
+# gpus가 없으면 슬롯은 1개만 허용하고 그 슬롯이 모든 GPU를 사용한다.
+DOCKER_HOSTS_ENV = "MOAI_DOCKER_HOSTS"
+
+# ping 결과를 재사용하는 시간(초)
+HEALTH_CHECK_TTL = 10
+
+# 호스트별 Docker API 커넥션 풀 크기
+MAX_POOL_SIZE = 10
+
+# ping, 컨테이너 목록/조회처럼 배치 판단에 쓰는 짧은 요청의 timeout(초).
+# 응답하지 않는 호스트 하나 때문에 요청이 오래 묶이지 않도록 짧게 둔다.
+DOCKER_PROBE_TIMEOUT = 5
+
+# 컨테이너 실행/exec용 클라이언트 timeout(초). exec 출력 스트림은 이 값을 읽기 timeout으로 쓰므로
+# 학습 로그가 한동안 없어도 끊기지 않도록 docker-py 기본값과 같게 둔다.
+DOCKER_API_TIMEOUT = 60
+
+# GPU 슬롯을 차지하지 않는 컨테이너 (기존 학습/추론 중복 실행 검사와 동일한 규칙)
+NON_GPU_SLOT_SUFFIXES = ("server", "_export", "_tensorboard")
+
+# 컨테이너에 배정된 GPU 슬롯을 기록하는 label. 서버가 재시작되어도 사용 중인 슬롯을 알 수 있다.
+GPU_SLOT_LABEL = "moai.gpu_slot"
+
+
+class DockerHost:
+    def __init__(self, name, base_url=None, address="192.168.100.40", gpu_slots=1, gpus=None,
+                 volume_path=VOLUME_PATH, local=False):
+        self.name = name
+        self.base_url = base_url
+        self.address = address
+        self.gpu_slots = gpu_slots
+        self.gpus = gpus
+        self.volume_path = volume_path
+        self.local = local
+
+        if gpus is None and gpu_slots > 1:
+            raise ValueError(f"{name}: gpu_slots가 2 이상이면 슬롯별로 나눌 gpus 목록이 필요합니다.")
+        if gpus is not None and len(gpus) < gpu_slots:
+            raise ValueError(f"{name}: gpus 수({len(gpus)})가 gpu_slots({gpu_slots})보다 적습니다.")
+
+        # 클라이언트는 처음 사용할 때 만든다 (데몬이 느려도 서버 기동이 막히지 않도록)
+        self._client = None
+        self._probe_client = None
+        self._client_lock = threading.Lock()
+
+        self.healthy = False
+        self.latency = None
+        self.checked_at = 0
+        self.running_jobs = []
+
+    @property
+    def client(self):
+        """컨테이너 실행/exec/종료에 쓰는 클라이언트"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self.connect(DOCKER_API_TIMEOUT)
+        return self._client
+
+    @property
+    def probe_client(self):
+        """health check와 배치 판단에 쓰는 짧은 timeout 클라이언트"""
+        if self._probe_client is None:
+            with self._client_lock:
+                if self._probe_client is None:
+                    self._probe_client = self.connect(DOCKER_PROBE_TIMEOUT)
+        return self._probe_client
+
+    def connect(self, timeout):
+        import docker
+
+        if self.base_url is None:
+            return docker.from_env(timeout=timeout, max_pool_size=MAX_POOL_SIZE)
+        return docker.DockerClient(base_url=self.base_url, timeout=timeout, max_pool_size=MAX_POOL_SIZE)
+
+    def check_health(self, force=False) -> bool:
+        """
+        Docker 데몬에 ping을 보내 상태를 확인한다. HEALTH_CHECK_TTL 동안은 결과를 재사용한다.
+        """
+        if not force and time.time() - self.checked_at < HEALTH_CHECK_TTL:
+            return self.healthy
+
+        started_at = time.time()
+        try:
+            self.healthy = self.probe_client.ping()
+            self.latency = time.time() - started_at
+        except Exception as e:
+            logger.warning(f"[HOST] {self.name} health check 실패: {e}")
+            self.healthy = False
+            self.latency = None
+        self.checked_at = time.time()
+
+        # readyz가 데몬을 직접 조회하지 않도록 실행 중인 컨테이너 목록도 함께 캐시
+        if self.healthy:
+            self.running_jobs = self.list_running_jobs() or []
+
+        return self.healthy
+
+    def slot_device_ids(self, slot: int):
+        """슬롯에 할당된 GPU id 목록. gpus가 없으면 None (모든 GPU 사용)"""
+        if self.gpus is None:
+            return None
+        per_slot = len(self.gpus) // self.gpu_slots
+        return self.gpus[slot * per_slot:(slot + 1) * per_slot]
+
+    def list_running_jobs(self) -> list:
+        """
+        실행 중인 컨테이너의 이름과 GPU 슬롯 목록
+
+        Returns:
+            list: [(name, slot)] 형태. 슬롯 label이 없으면 slot은 None
+        """
+        try:
+            jobs = []
+            for c in self.probe_client.containers.list(all=False):
+                slot = c.labels.get(GPU_SLOT_LABEL)
+                jobs.append((c.name, int(slot) if slot is not None else None))
+            return jobs
+        except Exception as e:
+            # 다음 배치에서 제외되도록 즉시 unhealthy 처리
+            logger.warning(f"[HOST] {self.name} 컨테이너 목록 조회 실패: {e}")
+            self.healthy = False
+            self.checked_at = time.time()
+            return None
+
+
+def load_hosts() -> dict:
+    config = os.environ.get(DOCKER_HOSTS_ENV)
+    if not config:
+        return {"local": DockerHost("local", local=True)}
+
+    hosts = {}
+    for entry in json.loads(config):
+        host = DockerHost(**entry)
+        hosts[host.name] = host
+    return hosts
+
+
+hosts = load_hosts()
+placement_lock = threading.Lock()
+# 이 서버가 배치한 작업이 사용 중인 GPU 슬롯 번호. 작업이 끝날 때 release_host()로 반환한다.
+# 컨테이너 목록 조회와 예약 사이에 다른 작업이 떠도 같은 슬롯을 두 번 배정하지 않는다.
+reserved_slots = {name: set() for name in hosts}
+
+
+def healthy_hosts() -> list:
+    """
+    백그라운드 모니터가 캐시한 상태 기준으로 정상인 호스트 목록. 요청 경로에서 ping을 보내지 않는다.
+    """
+    return [host for host in hosts.values() if host.healthy]
+
+
+def running_jobs_by_host() -> list:
+    """
+    정상 호스트들의 실행 중인 작업 목록을 조회한다. 조회는 placement_lock 밖에서 하며,
+    실패한 호스트는 list_running_jobs()가 unhealthy로 표시하고 결과에서 빠진다.
+
+    Returns:
+        list: [(DockerHost, [(name, slot)])]
+    """
+    snapshot = []
+    for host in healthy_hosts():
+        running_jobs = host.list_running_jobs()
+        if running_jobs is not None:
+            snapshot.append((host, running_jobs))
+    return snapshot
+
+
+def is_gpu_slot_container(name: str) -> bool:
+    return not name.endswith(NON_GPU_SLOT_SUFFIXES)
+
+
+def free_gpu_slots(host: DockerHost, running_jobs: list) -> list:
+    """
+    비어 있는 GPU 슬롯 번호 목록. 슬롯 label이 없는 GPU 컨테이너(이전 버전에서 띄운 것)도 슬롯 하나를 차지한다.
+    """
+    gpu_jobs = [slot for name, slot in running_jobs if is_gpu_slot_container(name)]
+    used = {slot for slot in gpu_jobs if slot is not None} | reserved_slots[host.name]
+    free = [slot for slot in range(host.gpu_slots) if slot not in used]
+
+    unlabeled = sum(1 for slot in gpu_jobs if slot is None)
+    return free[unlabeled:]
+
+
+def has_gpu_capacity() -> bool:
+    """학습/추론을 새로 실행할 수 있는 호스트가 하나라도 있는지 확인한다."""
+    snapshot = running_jobs_by_host()
+    with placement_lock:
+        return any(free_gpu_slots(host, running_jobs) for host, running_jobs in snapshot)
+
+
+def reserve_host(gpu_slot: bool = True):
+    """
+    작업을 실행할 호스트를 고른다. 실행 중인 컨테이너가 가장 적은 호스트를 우선한다.
+    GPU 작업은 작업이 끝나 release_host()를 호출할 때까지 슬롯을 예약해둔다.
+
+    Args:
+        gpu_slot (bool): 학습/추론처럼 GPU 슬롯이 필요한 작업인지 여부
+
+    Returns:
+        tuple: (DockerHost, 슬롯 번호). GPU 슬롯이 필요 없는 작업이면 슬롯 번호는 None
+    """
+    snapshot = running_jobs_by_host()
+
+    with placement_lock:
+        candidates = []
+        busy = []
+        for host, running_jobs in snapshot:
+            free_slots = free_gpu_slots(host, running_jobs)
+            if gpu_slot and not free_slots:
+                busy.extend(name for name, _ in running_jobs if is_gpu_slot_container(name))
+                continue
+            load = len(running_jobs) + len(reserved_slots[host.name])
+            candidates.append((load, host.name, host, free_slots))
+
+        if not candidates:
+            if busy:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{', '.join(busy)} 컨테이너가 이미 실행중"
+                )
+            raise HTTPException(status_code=503, detail="사용 가능한 Docker 호스트가 없습니다.")
+
+        _, _, host, free_slots = min(candidates, key=lambda candidate: candidate[:2])
+        slot = None
+        if gpu_slot:
+            slot = free_slots[0]
+            reserved_slots[host.name].add(slot)
+        logger.info(f"[HOST] {host.name} 호스트에 작업 배치 (GPU 슬롯: {slot})")
+        return host, slot
+
+
+def release_host(host: DockerHost, slot=None):
+    """
+    작업이 끝났거나 실행에 실패했을 때 예약한 GPU 슬롯을 돌려준다.
+    """
+    if slot is None:
+        return
+    with placement_lock:
+        reserved_slots[host.name].discard(slot)
+
+
+def host_status() -> list:
+    """
+    캐시된 호스트 상태를 반환한다. 데몬에 요청을 보내지 않으므로 probe에서 호출해도 가볍다.
+    """
+    status = []
+    for host in hosts.values():
+        free_slots = len(free_gpu_slots(host, host.running_jobs)) if host.healthy else 0
+        status.append({
+            "name": host.name,
+            "healthy": host.healthy,
+            "latency_ms": round(host.latency * 1000, 1) if host.latency is not None else None,
+            "checked_at": host.checked_at,
+            "gpu_slots": host.gpu_slots,
+            "free_gpu_slots": free_slots,
+            "reserved_slots": len(reserved_slots[host.name]),
+        })
+    return status
+
+
+def start_health_monitor():
+    """
+    HEALTH_CHECK_TTL 간격으로 모든 호스트 상태를 백그라운드에서 갱신한다.
+    응답하지 않는 호스트가 다른 호스트의 갱신을 늦추지 않도록 호스트마다 스레드를 따로 두고,
+    ping은 probe_client의 DOCKER_PROBE_TIMEOUT 안에 끝난다.
+    """
+    def run_monitor(host):
+        while True:
+            host.check_health(force=True)
+            time.sleep(HEALTH_CHECK_TTL)
+
+    for host in hosts.values():
+        monitor_thread = threading.Thread(target=run_monitor, args=(host,))
+        monitor_thread.daemon = True  # 메인 스레드 종료 시 함께 종료
+        monitor_thread.start()
+
+
+def find_container(container_name: str):
+    """
+    모든 호스트에서 이름이 일치하는 컨테이너를 찾는다. (실행 중 여부와 무관)
+
+    Returns:
+        tuple: (DockerHost, Container). 없으면 (None, None)
+    """
+    import docker.errors
+
+    for host in healthy_hosts():
+        try:
+            # 어느 호스트에 있는지는 짧은 timeout으로 찾고, 종료/삭제에 쓸 객체는 일반 클라이언트로 받는다
+            host.probe_client.containers.get(container_name)
+            return host, host.client.containers.get(container_name)
+        except docker.errors.NotFound:
+            continue
+        except Exception as e:
+            logger.warning(f"[HOST] {host.name} 컨테이너 조회 실패: {e}")
+            continue
+    return None, None
@@ -1,53 +1,188 @@
-import docker
 from models.train import TrainRequest
 from models.inference import InferenceRequest
 from models.export import ExportRequest
 from fastapi import HTTPException
+import itertools
 import time
 import threading
 import os
 import logging
 import yaml
 
-from utils import VOLUME_PATH
+from containers.docker_hosts import GPU_SLOT_LABEL, find_container, release_host, reserve_host
+from utils.dataset_cache import DATASET_MOUNT_PATH, can_stage_dataset, entry_name, pin, unpin, stage_dataset
+from utils.events import publish
+from utils.tracing import current_trace_context, span, start_trace
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-client = docker.from_env()
+# progress 이벤트 최소 간격(초). 컨테이너 출력 한 줄마다 이벤트를 보내지 않도록 한다.
+PROGRESS_EVENT_INTERVAL = 2
+
+# /stop이나 스윕 조기 종료로 종료를 요청한 컨테이너 이름 -> 종료 사유.
+# kill된 컨테이너는 exit code 137로 끝나므로 실패와 구분하기 위해 기록한다.
+stop_requests = {}
+stop_requests_lock = threading.Lock()
+
+def publish_job_event(event, job, request, **data):
+    publish(event, job, request.project, request.subproject, request.task, request.version, **data)
+
+def request_stop(container_name, reason="user"):
+    """컨테이너를 kill하기 전에 호출한다. 작업 스레드가 failed 대신 stopped 이벤트를 발행한다."""
+    with stop_requests_lock:
+        stop_requests[container_name] = reason
+
+def pop_stop_reason(container_name):
+    with stop_requests_lock:
+        return stop_requests.pop(container_name, None)
+
+def run_exec(container, command, job, request):
+    """
+    컨테이너에서 명령을 실행하고 출력을 로그와 progress 이벤트로 흘려보낸다.
+    호출하는 작업 스레드의 trace 안에서 exec_startup/exec span을 기록한다.
+
+    Returns:
+        int | None: 명령의 exit code (확인할 수 없으면 None)
+    """
+    import docker.errors
+
+    api = container.client.api
+
+    # exec 생성부터 첫 출력까지를 시작 지연으로 기록
+    with span("exec_startup"):
+        exec_id = api.exec_create(container.id, command)["Id"]
+        output_stream = iter(api.exec_start(exec_id, stream=True))
+        first_output = next(output_stream, None)
+
+    with span("exec"):
+        last_progress_at = 0
+        outputs = [] if first_output is None else [first_output]
+        for output in itertools.chain(outputs, output_stream):
+            line = output.decode('utf-8', errors='replace')
+            logger.info(line)
+            if time.time() - last_progress_at >= PROGRESS_EVENT_INTERVAL:
+                last_progress_at = time.time()
+                publish_job_event("progress", job, request, output=line.strip()[-500:])
+
+    try:
+        return api.exec_inspect(exec_id)["ExitCode"]
+    except docker.errors.APIError:
+        return None
+
+def remove_old_container(container_name, log_prefix=""):
+    # 이전 컨테이너는 다른 호스트에 남아 있을 수도 있다
+    with span("remove_old_container"):
+        _, old_container = find_container(container_name)
+        if old_container is not None:
+            old_container.stop()
+            old_container.remove(force=True)
+            logger.info(f"{log_prefix}Removed old container: {old_container.name}")
+        else:
+            logger.info(f"{log_prefix}No old container found.")
+
+def gpu_device_requests(host=None, slot=None):
+    """
+    슬롯에 할당된 GPU만 컨테이너에 연결한다. 슬롯이 없거나 호스트에 gpus 설정이 없으면 모든 GPU를 사용한다.
+    """
+    # docker는 import 비용이 커서 실제로 컨테이너를 띄울 때 불러온다
+    import docker.types
+
+    device_ids = host.slot_device_ids(slot) if slot is not None else None
+    if device_ids is None:
+        return [
+            docker.types.DeviceRequest(
+                count=-1,  # 모든 GPU 사용
+                capabilities=[["gpu"]]
+            )
+        ]
+
+    return [
+        docker.types.DeviceRequest(
+            device_ids=device_ids,
+            capabilities=[["gpu"]]
+        )
+    ]
+
+def publish_exit_event(job, request, container_name, exit_code, artifacts):
+    reason = pop_stop_reason(container_name)
+    if reason is not None:
+        publish_job_event("stopped", job, request, reason=reason, exit_code=exit_code, artifacts=artifacts)
+        return
+    event = "finished" if exit_code == 0 else "failed"
+    publish_job_event(event, job, request, exit_code=exit_code, artifacts=artifacts)
+
+def publish_error_event(job, request, container_name, error):
+    # 종료 요청으로 exec 스트림이 끊겨 예외가 난 경우도 stopped로 본다
+    reason = pop_stop_reason(container_name)
+    if reason is not None:
+        publish_job_event("stopped", job, request, reason=reason, error=error)
+    else:
+        publish_job_event("failed", job, request, error=error)
+
+def write_train_config(request: TrainRequest, dataset_path=None):
+    """
+    버전 폴더에 train_config.yaml을 기록한다. (학습 컨테이너의 train.py가 읽는다)
+
+    Args:
+        request (TrainRequest): 학습 요청
+        dataset_path (str | None): 컨테이너 내부에서 사용할 캐시 데이터셋 경로
+    """
+    version_path = f"/moai/{request.project}/{request.subproject}/{request.task}/{request.version}"
+    os.makedirs(version_path, exist_ok=True)
+
+    train_config_path = f"{version_path}/train_config.yaml"
+    with open(train_config_path, "w") as f:
+        train_config = {}
+        train_config["project"] = request.project
+        train_config["subproject"] = request.subproject
+        train_config["task"] = request.task
+        train_config["version"] = request.version
+        train_config["model_type"] = request.model_type
+        train_config["created_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        if request.hyperparameters:
+            train_config["hyperparameters"] = request.hyperparameters
+        if dataset_path is not None:
+            train_config["dataset_path"] = dataset_path
+        yaml.dump(train_config, f)
 
 def train_model(request: TrainRequest):
+    host = None
+    slot = None
+    dataset_entry = None
+    launched = False
     try:
+        publish_job_event("queued", "train", request)
+
+        # 작업을 실행할 Docker 호스트 선택
+        with span("placement"):
+            host, slot = reserve_host()
+
         # 컨테이너 이름 형식: project_subproject_task_version_train
         container_name = f"{request.project}_{request.subproject}_{request.task}_{request.version}_train"
+        # 같은 이름의 이전 작업에 남은 종료 요청은 새 작업에 적용하지 않는다
+        pop_stop_reason(container_name)
         
         version_path = f"/moai/{request.project}/{request.subproject}/{request.task}/{request.version}"
         if not os.path.exists(version_path):
             os.makedirs(version_path)
             logger.info(f"Created directory: {version_path}")
 
-        train_config_path = f"{version_path}/train_config.yaml"
-        with open(train_config_path, "w") as f:
-            train_config = {}
-            train_config["project"] = request.project
-            train_config["subproject"] = request.subproject
-            train_config["task"] = request.task
-            train_config["version"] = request.version
-            train_config["model_type"] = request.model_type
-            train_config["created_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
-            yaml.dump(train_config, f)
+        # 학습이 끝날 때까지 데이터셋 캐시 항목이 eviction되지 않도록 고정
+        dataset_entry = entry_name(request.project, request.subproject, request.task, request.version)
+        pin(dataset_entry)
 
-        try:
-            old_container = client.containers.get(container_name)
-            old_container.stop()
-            old_container.remove(force=True)
-            logger.info(f"Removed old container: {old_container.name}")
-        except docker.errors.NotFound:
-            logger.info("No old container found.")
+        # 로컬 캐시는 이 서버와 같은 호스트에서, 캐시 볼륨이 마운트된 경우에만 쓸 수 있다
+        use_dataset_cache = host.local and can_stage_dataset(request.project, request.subproject, request.task, request.version)
+
+        with span("write_train_config"):
+            write_train_config(request, DATASET_MOUNT_PATH if use_dataset_cache else None)
+
+        remove_old_container(container_name)
 
         # 모델 컨테이너의 볼륨 관리
         volumes = {
-            f"{VOLUME_PATH}": {  # 변경된 볼륨 경로
+            host.volume_path: {  # 호스트별 프로젝트 볼륨 경로
                 "bind": "/moai",
                 "mode": "rw"
             }
@@ -64,66 +199,102 @@ def train_model(request: TrainRequest):
             f"--version {request.version} "
         ]
 
-        try:
-            container = client.containers.run(
-                image=f"{request.model_type}:latest",  # 이미지 이름 및 태그 지정
-                name=container_name,
-                volumes=volumes,
-                device_requests=[
-                    docker.types.DeviceRequest(
-                        count=-1,  # 모든 GPU 사용
-                        capabilities=[["gpu"]]
-                    )
-                ],
-                tty=True,
-                stdin_open=True, # -i 옵션 추가
-                detach=True,
-                shm_size="32G",  # 변경된 shm-size
-            )
-            logger.info(f"Container {container_name} started successfully.")
-        except Exception as e:
-            logger.error(f"Failed to start container {container_name}: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Failed to start container: {str(e)}")
-
-        def run_training(container, train_command):
-            """학습을 실제로 수행하는 함수 (별도 스레드에서 실행)"""
-            logger.info("[TRAINING] container training started...")
-            exec_result = container.exec_run(train_command, stream=True)
-
-            for output in exec_result.output:
-                logger.info(output.decode('utf-8', errors='replace'))
-            logger.info("[TRAINING] container training finished...")
-
-            container.stop()
-            container.remove(force=True)
+        def run_training(host, volumes, train_command):
+            """
+            데이터셋 동기화 후 컨테이너를 띄워 학습을 수행하는 함수 (별도 스레드에서 실행)
+            데이터셋 복사가 오래 걸릴 수 있어 요청 처리와 분리한다.
+            """
+            trace_id, parent_span_id, sampled = trace_context
+            with start_trace("train.job", kind="job", trace_id=trace_id, parent_span_id=parent_span_id, sampled=sampled, container=container_name):
+                try:
+                    if use_dataset_cache:
+                        with span("dataset_staging"):
+                            dataset_cache_path = stage_dataset(request.project, request.subproject, request.task, request.version)
+                        if dataset_cache_path is not None:
+                            volumes[dataset_cache_path] = {
+                                "bind": DATASET_MOUNT_PATH,
+                                "mode": "ro"
+                            }
+                        else:
+                            # 요청 이후 캐시 볼륨이나 데이터셋 폴더가 사라졌으면 /moai의 원본 데이터셋을 사용한다
+                            logger.warning("[TRAINING] 데이터셋 캐시를 사용할 수 없어 원본 경로로 학습합니다.")
+                            write_train_config(request)
+
+                    with span("containers.run", host=host.name):
+                        container = host.client.containers.run(
+                            image=f"{request.model_type}:latest",  # 이미지 이름 및 태그 지정
+                            name=container_name,
+                            volumes=volumes,
+                            device_requests=gpu_device_requests(host, slot),
+                            labels={GPU_SLOT_LABEL: str(slot)},  # 서버 재시작 후에도 사용 중인 슬롯을 알 수 있도록 기록
+                            tty=True,
+                            stdin_open=True, # -i 옵션 추가
+                            detach=True,
+                            shm_size="32G",  # 변경된 shm-size
+                        )
+                    logger.info(f"Container {container_name} started successfully on {host.name}.")
+                    publish_job_event("started", "train", request, container=container_name)
+
+                    logger.info("[TRAINING] container training started...")
+                    exit_code = run_exec(container, train_command, "train", request)
+                    logger.info("[TRAINING] container training finished...")
+
+                    container.stop()
+                    container.remove(force=True)
+
+                    publish_exit_event("train", request, container_name, exit_code, [f"{version_path}/training_result"])
+                except Exception as e:
+                    logger.error(f"[TRAINING] {e}")
+                    publish_error_event("train", request, container_name, str(e))
+                finally:
+                    # 학습이 끝났거나 실패했으면 슬롯을 돌려주고 캐시 고정을 푼다
+                    release_host(host, slot)
+                    unpin(dataset_entry)
+
+        # 학습 스레드의 작업 trace를 이 요청의 trace와 연결
+        trace_context = current_trace_context()
 
         # 학습을 별도의 스레드에서 실행
-        training_thread = threading.Thread(target=run_training, args=(container, train_command))
+        training_thread = threading.Thread(target=run_training, args=(host, volumes, train_command))
         training_thread.daemon = True  # 메인 스레드 종료 시 함께 종료
         training_thread.start()
+        # 이후 슬롯 반환과 unpin은 학습 스레드가 맡는다
+        launched = True
 
     except Exception as e:
         logger.info(f"Training failed: {str(e)}")
+        publish_job_event("failed", "train", request, error=str(e))
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if not launched:
+            if dataset_entry is not None:
+                unpin(dataset_entry)
+            if host is not None:
+                release_host(host, slot)
 
 def inference_model(request: InferenceRequest):   
+    host = None
+    slot = None
+    launched = False
     try:
+        publish_job_event("queued", "inference", request)
+
+        # 작업을 실행할 Docker 호스트 선택
+        with span("placement"):
+            host, slot = reserve_host()
+
         # 컨테이너 이름. 형식: project_subproject_task_version
         container_name = f"{request.project}_{request.subproject}_{request.task}_{request.version}_inference"
+        pop_stop_reason(container_name)
 
         train_config_path = f"/moai/{request.project}/{request.subproject}/{request.task}/{request.version}/train_config.yaml"
-        with open(train_config_path, "r") as f:
-            train_config = yaml.safe_load(f)
+        with span("read_train_config"):
+            with open(train_config_path, "r") as f:
+                train_config = yaml.safe_load(f)
         
         model_type = train_config["model_type"]
 
-        try:
-            old_container = client.containers.get(container_name)
-            old_container.stop()
-            old_container.remove(force=True)
-            logger.info(f"[INFERENCE] Removed old container: {old_container.name}")
-        except docker.errors.NotFound:
-            logger.info("[INFERENCE] No old container found.")
+        remove_old_container(container_name, "[INFERENCE] ")
 
         inference_command = [
             "bash",
@@ -136,55 +307,77 @@ def inference_model(request: InferenceRequest):
         ]
 
         volumes = {
-            f"{VOLUME_PATH}": {  # 변경된 볼륨 경로
+            host.volume_path: {  # 호스트별 프로젝트 볼륨 경로
                 "bind": "/moai",
                 "mode": "rw"
             }
         }
 
         try:
-            container = client.containers.run(
-                image=f"{model_type}:latest",  # 이미지 이름 및 태그 지정
-                name=container_name,
-                volumes=volumes,
-                device_requests=[
-                    docker.types.DeviceRequest(
-                        count=-1,  # 모든 GPU 사용
-                        capabilities=[["gpu"]]
-                    )
-                ],
-                tty=True,
-                stdin_open=True, # -i 옵션 추가
-                detach=True,
-                shm_size="32G",  # 변경된 shm-size,
-            )
-            logger.info(f"Container {container_name} started successfully.")
+            with span("containers.run", host=host.name):
+                container = host.client.containers.run(
+                    image=f"{model_type}:latest",  # 이미지 이름 및 태그 지정
+                    name=container_name,
+                    volumes=volumes,
+                    device_requests=gpu_device_requests(host, slot),
+                    labels={GPU_SLOT_LABEL: str(slot)},  # 서버 재시작 후에도 사용 중인 슬롯을 알 수 있도록 기록
+                    tty=True,
+                    stdin_open=True, # -i 옵션 추가
+                    detach=True,
+                    shm_size="32G",  # 변경된 shm-size,
+                )
+            logger.info(f"Container {container_name} started successfully on {host.name}.")
+            publish_job_event("started", "inference", request, container=container_name)
         except Exception as e:
             logger.error(f"Failed to start container {container_name}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to start container: {str(e)}")
 
         def run_inference(container, inference_command):
             """학습을 실제로 수행하는 함수 (별도 스레드에서 실행)"""
-            logger.info("[INFERENCE] YOLO container inference started...")
-            exec_result = container.exec_run(inference_command, stream=True)
-            for output in exec_result.output:
-                logger.info(output.decode('utf-8', errors='replace'))
-            logger.info("[INFERENCE] YOLO container inference finished...")
-
-            container.kill()
-            container.remove(force=True)
+            try:
+                logger.info("[INFERENCE] YOLO container inference started...")
+                trace_id, parent_span_id, sampled = trace_context
+                with start_trace("inference.job", kind="job", trace_id=trace_id, parent_span_id=parent_span_id, sampled=sampled, container=container.name):
+                    exit_code = run_exec(container, inference_command, "inference", request)
+                logger.info("[INFERENCE] YOLO container inference finished...")
+
+                container.kill()
+                container.remove(force=True)
+
+                inference_result_path = f"/moai/{request.project}/{request.subproject}/{request.task}/{request.version}/inference_result"
+                publish_exit_event("inference", request, container.name, exit_code, [inference_result_path])
+            except Exception as e:
+                logger.error(f"[INFERENCE] {e}")
+                publish_error_event("inference", request, container.name, str(e))
+            finally:
+                release_host(host, slot)
+
+        # 작업 스레드의 trace를 이 요청의 trace와 연결
+        trace_context = current_trace_context()
 
         # 예측을 별도의 스레드에서 실행
         inference_thread = threading.Thread(target=run_inference, args=(container, inference_command))
         inference_thread.daemon = True  # 메인 스레드 종료 시 함께 종료
         inference_thread.start()
+        # 이후 슬롯 반환은 예측 스레드가 맡는다
+        launched = True
 
     except Exception as e:
         logger.error(e)
+        publish_job_event("failed", "inference", request, error=str(e))
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if not launched and host is not None:
+            release_host(host, slot)
 
 def export_model(request: ExportRequest):
     try:
+        publish_job_event("queued", "export", request)
+
+        # 작업을 실행할 Docker 호스트 선택
+        with span("placement"):
+            host, _ = reserve_host(gpu_slot=False)
+
         container_name = f"{request.project}_{request.subproject}_{request.task}_{request.version}_export"
         export_end_txt_path = f"/moai/{request.project}/{request.subproject}/{request.task}/{request.version}/weights/export_end.txt"
 
@@ -193,18 +386,13 @@ def export_model(request: ExportRequest):
             logger.info(f"[EXPORT] Removed export_end.txt: {export_end_txt_path}")
 
         train_config_path = f"/moai/{request.project}/{request.subproject}/{request.task}/{request.version}/train_config.yaml"
-        with open(train_config_path, "r") as f:
-            train_config = yaml.safe_load(f)
+        with span("read_train_config"):
+            with open(train_config_path, "r") as f:
+                train_config = yaml.safe_load(f)
         
         model_type = train_config["model_type"]
 
-        try:
-            old_container = client.containers.get(container_name)
-            old_container.stop()
-            old_container.remove(force=True)
-            logger.info(f"[EXPORT] Removed old container: {old_container.name}")
-        except docker.errors.NotFound:
-            logger.info("[EXPORT] No old container found.")
+        remove_old_container(container_name, "[EXPORT] ")
 
         export_command = [
             "bash",
@@ -217,48 +405,53 @@ def export_model(request: ExportRequest):
         ]
 
         volumes = {
-            f"{VOLUME_PATH}": {  # 변경된 볼륨 경로
+            host.volume_path: {  # 호스트별 프로젝트 볼륨 경로
                 "bind": "/moai",
                 "mode": "rw"
             }
         }
 
         try:
-            container = client.containers.run(
-                image=f"{model_type}:latest",  # 이미지 이름 및 태그 지정
-                name=container_name,
-                volumes=volumes,
-                device_requests=[
-                    docker.types.DeviceRequest(
-                        count=-1,  # 모든 GPU 사용
-                        capabilities=[["gpu"]]
-                    )
-                ],
-                tty=True,
-                stdin_open=True, # -i 옵션 추가
-                detach=True,
-                shm_size="32G",  # 변경된 shm-size
-            )
-            logger.info(f"Container {container_name} started successfully.")
+            with span("containers.run", host=host.name):
+                container = host.client.containers.run(
+                    image=f"{model_type}:latest",  # 이미지 이름 및 태그 지정
+                    name=container_name,
+                    volumes=volumes,
+                    device_requests=gpu_device_requests(),
+                    tty=True,
+                    stdin_open=True, # -i 옵션 추가
+                    detach=True,
+                    shm_size="32G",  # 변경된 shm-size
+                )
+            logger.info(f"Container {container_name} started successfully on {host.name}.")
+            publish_job_event("started", "export", request, container=container_name)
         except Exception as e:
             logger.error(f"Failed to start container {container_name}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to start container: {str(e)}")
 
         def run_export(container, export_command):
             """학습을 실제로 수행하는 함수 (별도 스레드에서 실행)"""
-            logger.info(f"[EXPORT] container export started...")
-            exec_result = container.exec_run(export_command, stream=True)
-            for output in exec_result.output:
-                logger.info(output.decode('utf-8', errors='replace'))
+            try:
+                logger.info(f"[EXPORT] container export started...")
+                trace_id, parent_span_id, sampled = trace_context
+                with start_trace("export.job", kind="job", trace_id=trace_id, parent_span_id=parent_span_id, sampled=sampled, container=container.name):
+                    exit_code = run_exec(container, export_command, "export", request)
+
+                with open(export_end_txt_path, "w") as f:
+                    f.write("export finished\n")
 
-            
-            with open(export_end_txt_path, "w") as f:
-                f.write("export finished\n")
+                logger.info("[EXPORT] container export finished...")
 
-            logger.info("[EXPORT] container export finished...")
+                container.kill()
+                container.remove(force=True)
 
-            container.kill()
-            container.remove(force=True)
+                publish_exit_event("export", request, container.name, exit_code, [os.path.dirname(export_end_txt_path)])
+            except Exception as e:
+                logger.error(f"[EXPORT] {e}")
+                publish_error_event("export", request, container.name, str(e))
+
+        # 작업 스레드의 trace를 이 요청의 trace와 연결
+        trace_context = current_trace_context()
 
         # 예측을 별도의 스레드에서 실행
         export_thread = threading.Thread(target=run_export, args=(container, export_command))
@@ -267,4 +460,5 @@ def export_model(request: ExportRequest):
 
     except Exception as e:
         logger.error(e)
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        publish_job_event("failed", "export", request, error=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,354 @@
+from fastapi import HTTPException
+import csv
+import itertools
+import logging
+import math
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+import yaml
+
+from models.sweep import ParameterRange, SweepRequest
+from containers.docker_hosts import find_container, has_gpu_capacity
+from containers.model_container import request_stop, train_model, write_train_config
+from utils.events import events_after
+
+logger = logging.getLogger(__name__)
+
+# 스케줄러가 trial 상태/지표를 확인하는 간격(초)
+SWEEP_POLL_INTERVAL = 10
+
+sweeps = {}
+sweeps_lock = threading.Lock()
+
+
+def sample_value(space):
+    if isinstance(space, ParameterRange):
+        if space.log:
+            value = math.exp(random.uniform(math.log(space.min), math.log(space.max)))
+        else:
+            value = random.uniform(space.min, space.max)
+        return int(round(value)) if space.integer else value
+    return random.choice(space)
+
+
+def generate_trials(request: SweepRequest) -> list:
+    """
+    파라미터 공간에서 trial별 하이퍼파라미터 조합을 만든다.
+
+    Returns:
+        list: 하이퍼파라미터 dict 목록
+    """
+    names = list(request.parameters.keys())
+
+    if request.strategy == "grid":
+        if any(isinstance(space, ParameterRange) for space in request.parameters.values()):
+            raise HTTPException(status_code=400, detail="grid 탐색은 값 목록만 지원합니다.")
+        combinations = itertools.product(*(request.parameters[name] for name in names))
+        trials = [dict(zip(names, values)) for values in combinations]
+        if request.num_trials is not None:
+            trials = trials[:request.num_trials]
+        return trials
+
+    if request.strategy == "random":
+        if request.num_trials is None:
+            raise HTTPException(status_code=400, detail="random 탐색은 num_trials가 필요합니다.")
+        return [
+            {name: sample_value(request.parameters[name]) for name in names}
+            for _ in range(request.num_trials)
+        ]
+
+    raise HTTPException(status_code=400, detail=f"지원하지 않는 탐색 방식입니다: {request.strategy}")
+
+
+def read_metric_history(version_path: str, metrics_file: str, metric: str) -> list:
+    """
+    학습 결과 csv에서 epoch별 지표 값을 읽는다. 아직 파일이 없으면 빈 목록을 반환한다.
+    """
+    path = f"{version_path}/{metrics_file}"
+    if not os.path.exists(path):
+        return []
+
+    history = []
+    try:
+        with open(path, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                # ultralytics results.csv는 컬럼명에 공백 패딩이 있다
+                row = {key.strip(): value for key, value in row.items() if key is not None}
+                if row.get(metric) not in (None, ""):
+                    history.append(float(row[metric]))
+    except (OSError, ValueError) as e:
+        logger.warning(f"[SWEEP] 지표 파싱 실패({path}): {e}")
+    return history
+
+
+def best_value(history: list, mode: str):
+    if not history:
+        return None
+    return max(history) if mode == "max" else min(history)
+
+
+class Sweep:
+    def __init__(self, request: SweepRequest):
+        self.request = request
+        # 같은 base로 같은 초에 시작한 스윕끼리 trial 버전(컨테이너 이름)이 겹치지 않도록 임의 접미사를 붙인다
+        self.sweep_id = f"{request.base.version}_sweep_{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.task_path = f"/moai/{request.base.project}/{request.base.subproject}/{request.base.task}"
+        self.stopped = False
+        self.last_event_seq = 0
+        # stop() 요청 스레드와 스케줄러 스레드가 trial 상태를 동시에 바꾸지 않도록 잠근다
+        self.lock = threading.Lock()
+        self.trials = []
+
+        base_dataset_path = f"{self.task_path}/{request.base.version}/dataset"
+        for index, hyperparameters in enumerate(generate_trials(request)):
+            trial_request = request.base.model_copy(update={
+                "version": f"{self.sweep_id}_{index:03d}",
+                "hyperparameters": {**request.base.hyperparameters, **hyperparameters},
+            })
+            write_train_config(trial_request)
+
+            # trial은 base 버전의 데이터셋을 공유한다 (데이터셋 캐시도 같은 항목을 사용)
+            trial_dataset_path = f"{self.task_path}/{trial_request.version}/dataset"
+            if os.path.isdir(base_dataset_path) and not os.path.lexists(trial_dataset_path):
+                os.symlink(f"../{request.base.version}/dataset", trial_dataset_path)
+
+            self.trials.append({
+                "request": trial_request,
+                "status": "pending",
+                "history": [],
+            })
+
+    def trial_container_name(self, trial) -> str:
+        r = trial["request"]
+        return f"{r.project}_{r.subproject}_{r.task}_{r.version}_train"
+
+    def running_trials(self) -> list:
+        return [trial for trial in self.trials if trial["status"] == "running"]
+
+    def launch_pending(self):
+        """동시 실행 제한과 GPU 여유가 허락하는 만큼 대기 중인 trial을 실행한다."""
+        for trial in self.trials:
+            with self.lock:
+                if self.stopped:
+                    return
+                if trial["status"] != "pending":
+                    continue
+                if self.request.max_concurrent is not None and len(self.running_trials()) >= self.request.max_concurrent:
+                    return
+                if not has_gpu_capacity():
+                    return
+                # train_model은 오래 걸릴 수 있으므로 잠금 밖에서 실행한다
+                trial["status"] = "launching"
+
+            try:
+                train_model(trial["request"])
+            except HTTPException as e:
+                with self.lock:
+                    if not has_gpu_capacity():
+                        # 확인 직후 다른 작업이 슬롯을 먼저 잡은 경우 다음 주기에 재시도
+                        trial["status"] = "cancelled" if self.stopped else "pending"
+                        logger.warning(f"[SWEEP] trial 실행 보류({trial['request'].version}): {e.detail}")
+                        return
+                    trial["status"] = "failed"
+                    trial["error"] = e.detail
+                    logger.error(f"[SWEEP] trial 실행 실패({trial['request'].version}): {e.detail}")
+                continue
+
+            with self.lock:
+                if self.stopped:
+                    # 실행하는 사이에 스윕이 중지되었으면 방금 띄운 trial도 종료한다
+                    self.kill_trial(trial, "cancelled")
+                    return
+                trial["status"] = "running"
+                logger.info(f"[SWEEP] trial 실행: {trial['request'].version}")
+
+    def collect_finished(self):
+        """학습 스레드가 발행한 finished/failed/stopped 이벤트로 trial 종료를 반영한다."""
+        versions = {trial["request"].version: trial for trial in self.trials}
+        with self.lock:
+            for message in events_after(self.last_event_seq):
+                self.last_event_seq = message["seq"]
+                trial = versions.get(message["version"])
+                if trial is None or message["job"] != "train":
+                    continue
+                if message["event"] not in ("finished", "failed", "stopped"):
+                    continue
+                # 학습 스레드가 끝났으므로 더 이상 종료할 컨테이너가 없다
+                trial.pop("kill_pending", None)
+                if trial["status"] == "running":
+                    # 스윕 밖에서 /stop으로 중단한 trial은 stopped로 남는다
+                    trial["status"] = message["event"]
+                    trial["exit_code"] = message.get("exit_code")
+
+    def update_metrics(self):
+        for trial in self.trials:
+            if trial["status"] in ("running", "finished", "early_stopped"):
+                trial["history"] = read_metric_history(
+                    f"{self.task_path}/{trial['request'].version}",
+                    self.request.metrics_file,
+                    self.request.metric,
+                )
+
+    def apply_early_stopping(self):
+        """
+        median stopping rule: 같은 epoch 기준으로 다른 trial들의 최고 지표 중앙값보다
+        나쁜 trial은 조기 종료한다.
+        """
+        if not self.request.early_stopping:
+            return
+
+        with self.lock:
+            self.stop_worse_trials()
+
+    def stop_worse_trials(self):
+        for trial in self.running_trials():
+            epoch = len(trial["history"])
+            if epoch < self.request.grace_epochs:
+                continue
+
+            others = [
+                best_value(other["history"][:epoch], self.request.mode)
+                for other in self.trials
+                if other is not trial and len(other["history"]) >= epoch
+            ]
+            if not others:
+                continue
+
+            median = statistics.median(others)
+            best = best_value(trial["history"], self.request.mode)
+            is_worse = best < median if self.request.mode == "max" else best > median
+            if is_worse:
+                logger.info(f"[SWEEP] 조기 종료: {trial['request'].version} (best={best}, median={median})")
+                self.kill_trial(trial, "early_stopped")
+
+    def kill_trial(self, trial, status):
+        """
+        trial 컨테이너를 종료한다. self.lock을 잡은 상태에서 호출해야 한다.
+        데이터셋 동기화 중이라 아직 컨테이너가 없으면 kill_stragglers()가 다음 주기에 다시 시도한다.
+        """
+        trial["status"] = status
+        trial["kill_pending"] = True
+        request_stop(self.trial_container_name(trial), status)
+        _, container = find_container(self.trial_container_name(trial))
+        if container is not None:
+            try:
+                container.kill()
+                trial.pop("kill_pending", None)
+            except Exception as e:
+                logger.error(f"[SWEEP] trial 컨테이너 종료 실패: {e}")
+
+    def kill_stragglers(self):
+        """종료를 요청했지만 컨테이너가 늦게 뜬 trial을 다시 종료한다."""
+        with self.lock:
+            for trial in self.trials:
+                if trial.get("kill_pending"):
+                    self.kill_trial(trial, trial["status"])
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            for trial in self.trials:
+                if trial["status"] == "pending":
+                    trial["status"] = "cancelled"
+                elif trial["status"] == "running":
+                    self.kill_trial(trial, "cancelled")
+
+    def leaderboard(self) -> list:
+        rows = []
+        for trial in self.trials:
+            rows.append({
+                "version": trial["request"].version,
+                "status": trial["status"],
+                "hyperparameters": trial["request"].hyperparameters,
+                "epochs": len(trial["history"]),
+                "best": best_value(trial["history"], self.request.mode),
+            })
+
+        scored = [row for row in rows if row["best"] is not None]
+        unscored = [row for row in rows if row["best"] is None]
+        scored.sort(key=lambda row: row["best"], reverse=self.request.mode == "max")
+        return scored + unscored
+
+    def summary(self) -> dict:
+        statuses = [trial["status"] for trial in self.trials]
+        return {
+            "sweep_id": self.sweep_id,
+            "strategy": self.request.strategy,
+            "metric": self.request.metric,
+            "mode": self.request.mode,
+            "stopped": self.stopped,
+            "counts": {status: statuses.count(status) for status in set(statuses)},
+            "leaderboard": self.leaderboard(),
+        }
+
+    def save(self):
+        sweeps_path = f"{self.task_path}/sweeps"
+        os.makedirs(sweeps_path, exist_ok=True)
+        with open(f"{sweeps_path}/{self.sweep_id}.yaml", "w") as f:
+            yaml.dump(self.summary(), f, allow_unicode=True, sort_keys=False)
+
+    def is_done(self) -> bool:
+        return all(
+            trial["status"] not in ("pending", "launching", "running") and not trial.get("kill_pending")
+            for trial in self.trials
+        )
+
+    def run(self):
+        """스윕이 끝날 때까지 trial 실행/종료 확인/조기 종료를 반복한다. (별도 스레드에서 실행)"""
+        logger.info(f"[SWEEP] {self.sweep_id} 시작: {len(self.trials)}개 trial")
+        while True:
+            try:
+                self.collect_finished()
+                self.kill_stragglers()
+                self.update_metrics()
+                self.apply_early_stopping()
+                self.launch_pending()
+                self.save()
+            except Exception as e:
+                logger.error(f"[SWEEP] {self.sweep_id} 스케줄링 오류: {e}")
+
+            if self.is_done():
+                break
+            time.sleep(SWEEP_POLL_INTERVAL)
+
+        self.update_metrics()
+        self.save()
+        logger.info(f"[SWEEP] {self.sweep_id} 종료")
+
+
+def start_sweep(request: SweepRequest) -> dict:
+    sweep = Sweep(request)
+    if not sweep.trials:
+        raise HTTPException(status_code=400, detail="생성된 trial이 없습니다.")
+
+    with sweeps_lock:
+        sweeps[sweep.sweep_id] = sweep
+
+    sweep_thread = threading.Thread(target=sweep.run)
+    sweep_thread.daemon = True  # 메인 스레드 종료 시 함께 종료
+    sweep_thread.start()
+
+    return sweep.summary()
+
+
+def get_sweep(sweep_id: str) -> Sweep:
+    with sweeps_lock:
+        sweep = sweeps.get(sweep_id)
+    if sweep is None:
+        raise HTTPException(status_code=404, detail=f"스윕을 찾을 수 없습니다: {sweep_id}")
+    return sweep
+
+
+def pending_trial_count() -> int:
+    """모든 스윕에서 GPU 슬롯을 기다리는 trial 수"""
+    with sweeps_lock:
+        return sum(
+            1
+            for sweep in sweeps.values()
+            for trial in sweep.trials
+            if trial["status"] == "pending"
+        )
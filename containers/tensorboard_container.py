@@ -1,46 +1,54 @@
-import docker
 from fastapi import HTTPException
 from models.tensorboard import TensorboardParams
-from utils import VOLUME_PATH
+from containers.docker_hosts import find_container, reserve_host
+from utils.tracing import span
 import logging
-import requests
 import time
 
 logger = logging.getLogger(__name__)
-client = docker.from_env()
+
+# TensorBoard UI 준비 확인 요청 한 번의 timeout(초)
+TENSORBOARD_READY_TIMEOUT = 2
 
 def create_tensorboard_container(tensorboard_params: TensorboardParams):
+    # docker, requests는 import 비용이 커서 실제 요청 시점에 불러온다
+    import docker.errors
+    import requests
+
     try:
         # [1] 우선 prefix (project_subproject_task_version) 구성
         new_prefix = f"{tensorboard_params.project}_{tensorboard_params.subproject}_{tensorboard_params.task}_{tensorboard_params.version}"
         container_name = f"{new_prefix}_tensorboard"
 
-        # [2] 동일 접두어로 만들어진 컨테이너가 이미 존재하는지(실행 중 여부와 무관) 확인
-        all_containers = client.containers.list(all=True)
-        for c in all_containers:
-            # c.name == "project_subproject_task_version_tensorboard" 형태
-            if c.name == container_name:
-                # 이미 동일 이름의 컨테이너가 존재
-                if c.status == "running":
+        # [2] 동일 이름의 컨테이너가 어느 호스트에든 이미 존재하는지(실행 중 여부와 무관) 확인
+        with span("find_container"):
+            _, c = find_container(container_name)
+        if c is not None:
+            # 이미 동일 이름의 컨테이너가 존재
+            if c.status == "running":
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"이미 활성화된 TensorBoard 컨테이너가 존재합니다: {c.name}"
+                )
+            else:
+                # (운영 정책에 따라) 중지 상태라도 이름 충돌이므로 제거
+                try:
+                    c.remove(force=True)
+                    logger.info(f"기존 중지된 컨테이너 {c.name} 을(를) 제거했습니다.")
+                except Exception as remove_ex:
+                    logger.error(f"기존 컨테이너 제거 실패: {remove_ex}")
                     raise HTTPException(
-                        status_code=400,
-                        detail=f"이미 활성화된 TensorBoard 컨테이너가 존재합니다: {c.name}"
+                        status_code=500,
+                        detail=f"기존 컨테이너 제거 중 오류가 발생했습니다: {remove_ex}"
                     )
-                else:
-                    # (운영 정책에 따라) 중지 상태라도 이름 충돌이므로 제거
-                    try:
-                        c.remove(force=True)
-                        logger.info(f"기존 중지된 컨테이너 {c.name} 을(를) 제거했습니다.")
-                    except Exception as remove_ex:
-                        logger.error(f"기존 컨테이너 제거 실패: {remove_ex}")
-                        raise HTTPException(
-                            status_code=500,
-                            detail=f"기존 컨테이너 제거 중 오류가 발생했습니다: {remove_ex}"
-                        )
+
+        # TensorBoard는 GPU 슬롯을 차지하지 않으므로 가장 한가한 호스트에 띄운다
+        with span("placement"):
+            host, _ = reserve_host(gpu_slot=False)
         
         # [3] 볼륨 설정
         volumes = {
-            VOLUME_PATH: {
+            host.volume_path: {  # 호스트별 프로젝트 볼륨 경로
                 "bind": "/moai",
                 "mode": "rw"
             }
@@ -64,17 +72,18 @@ def create_tensorboard_container(tensorboard_params: TensorboardParams):
                     "--bind_all",
                 ]
 
-                container = client.containers.run(
-                    image="moai_tensorboard:latest",
-                    command=run_tensorboard_command,
-                    name=container_name,
-                    volumes=volumes,
-                    ports=ports_mapping,
-                    detach=True,
-                    tty=True,
-                    stdin_open=True
-                )
-                logger.info(f"Created new container: {container_name} on port {port}")
+                with span("containers.run", host=host.name, port=port):
+                    container = host.client.containers.run(
+                        image="moai_tensorboard:latest",
+                        command=run_tensorboard_command,
+                        name=container_name,
+                        volumes=volumes,
+                        ports=ports_mapping,
+                        detach=True,
+                        tty=True,
+                        stdin_open=True
+                    )
+                logger.info(f"Created new container: {container_name} on {host.name}:{port}")
                 selected_port = port
                 break
 
@@ -96,26 +105,28 @@ def create_tensorboard_container(tensorboard_params: TensorboardParams):
             )
 
         # [5] TensorBoard 페이지가 실제로 준비되었는지 검증
-        max_retries = 60
-        for attempt in range(max_retries):
-            try:
+        with span("wait_ready", port=selected_port):
+            max_retries = 60
+            for attempt in range(max_retries):
+                try:
 
-                # Use the Docker host IP instead of localhost
-                response = requests.get(f"http://192.168.100.40:{selected_port}")
+                    # Use the Docker host IP instead of localhost
+                    response = requests.get(f"http://{host.address}:{selected_port}", timeout=TENSORBOARD_READY_TIMEOUT)
 
-                if response.status_code == 200 and "TensorBoard" in response.text:
-                    logger.info(
-                        f"TensorBoard UI is successfully loaded on port {selected_port}"
-                    )
-                    return {
-                        "message": f"TensorBoard '{container_name}' 컨테이너가 성공적으로 생성되었습니다.",
-                        "port": selected_port
-                    }
-            except requests.exceptions.RequestException as e:
-                # 아직 뜨지 않았을 수 있으니 재시도
-                logger.debug(f"TensorBoard 웹 UI 확인 재시도({attempt+1}/{max_retries}): {e}")
+                    if response.status_code == 200 and "TensorBoard" in response.text:
+                        logger.info(
+                            f"TensorBoard UI is successfully loaded on port {selected_port}"
+                        )
+                        return {
+                            "message": f"TensorBoard '{container_name}' 컨테이너가 성공적으로 생성되었습니다.",
+                            "host": host.address,
+                            "port": selected_port
+                        }
+                except requests.exceptions.RequestException as e:
+                    # 아직 뜨지 않았을 수 있으니 재시도
+                    logger.debug(f"TensorBoard 웹 UI 확인 재시도({attempt+1}/{max_retries}): {e}")
 
-            time.sleep(1)
+                time.sleep(1)
 
         # 충분히 재시도했음에도 UI 확인이 안 되면 예외 처리
         raise HTTPException(
@@ -137,13 +148,9 @@ def stop_tensorboard_container(tensorboard_params: TensorboardParams):
         prefix = f"{tensorboard_params.project}_{tensorboard_params.subproject}_{tensorboard_params.task}_{tensorboard_params.version}"
         container_name = f"{prefix}_tensorboard"
 
-        # 이름이 정확히 일치하는 컨테이너 검색(실행 중 여부와 무관)
-        containers = client.containers.list(all=True)
-        target_container = None
-        for c in containers:
-            if c.name == container_name:
-                target_container = c
-                break
+        # 컨테이너를 띄운 호스트에서 이름이 정확히 일치하는 컨테이너 검색(실행 중 여부와 무관)
+        with span("find_container"):
+            _, target_container = find_container(container_name)
 
         if target_container is None:
             raise HTTPException(
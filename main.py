@@ -1,24 +1,54 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 
 from routers.train import router as train_router
 from routers.inference import router as inference_router
 from routers.tensorboard import router as tensorboard_router
 from routers.stop import router as stop_router
 from routers.export import router as export_router
+from routers.events import router as events_router
+from routers.sweep import router as sweep_router
+from routers.health import router as health_router
+from routers.debug import router as debug_router
+from routers.weights import router as weights_router
+from containers.docker_hosts import start_health_monitor
+from utils.tracing import start_trace
+
+# 스트리밍/probe/디버그 요청은 slow 목록을 어지럽히므로 추적하지 않는다
+UNTRACED_PATHS = ("/events", "/healthz", "/readyz", "/debug")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Docker 호스트 상태는 백그라운드에서 갱신한다 (기동 시 데몬 연결을 기다리지 않음)
+    start_health_monitor()
+    yield
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    if request.url.path.startswith(UNTRACED_PATHS):
+        return await call_next(request)
+
+    with start_trace(f"{request.method} {request.url.path}") as trace:
+        request_id = request.headers.get("X-Request-ID") or trace.trace_id
+        trace.attributes["request_id"] = request_id
+        response = await call_next(request)
+        trace.attributes["status_code"] = response.status_code
+        if response.status_code >= 500:
+            # 예외 핸들러가 응답으로 바꾼 서버 오류도 오류 trace로 남긴다
+            trace.error = f"HTTP {response.status_code}"
+
+    response.headers["X-Request-ID"] = request_id
+    return response
 
-app = FastAPI()
 app.include_router(train_router)
 app.include_router(inference_router)
 app.include_router(tensorboard_router)
 app.include_router(stop_router)
 app.include_router(export_router)
-
-# get 테스트
-@app.get("/")
-def hello_world():
-    return {"message": "Hello World!"}
-
-# post 테스트
-@app.post("/")
-def hello_world():
-    return {"message": "Hello World!"}
\ No newline at end of file
+app.include_router(events_router)
+app.include_router(sweep_router)
+app.include_router(health_router)
+app.include_router(debug_router)
+app.include_router(weights_router)
\ No newline at end of file
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional, Union
+
+from models.train import TrainRequest
+
+class ParameterRange(BaseModel):
+    min: float
+    max: float
+    log: bool = False
+    integer: bool = False
+
+class SweepRequest(BaseModel):
+    base: TrainRequest
+    # grid: 값 목록만 허용 / random: 값 목록(choice) 또는 범위
+    parameters: Dict[str, Union[List[Any], ParameterRange]]
+    strategy: Literal["grid", "random"] = "grid"
+    num_trials: Optional[int] = Field(None, ge=1)
+    max_concurrent: Optional[int] = Field(None, ge=1)
+    # 리더보드/조기 종료 기준 (training_result/results.csv 컬럼명)
+    metric: str = "metrics/mAP50-95(B)"
+    mode: Literal["max", "min"] = "max"
+    metrics_file: str = "training_result/results.csv"
+    early_stopping: bool = True
+    # 최소 1 epoch의 지표가 있어야 다른 trial과 비교할 수 있다
+    grace_epochs: int = Field(10, ge=1)
+
+class SweepParams(BaseModel):
+    sweep_id: str
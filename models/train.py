@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Any, Dict
 
 class TrainRequest(BaseModel):
     project: str
@@ -6,4 +7,5 @@ class TrainRequest(BaseModel):
     task: str
     version: str
     model_type: str
+    hyperparameters: Dict[str, Any] = {}
 
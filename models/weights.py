@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+class WeightsParams(BaseModel):
+    project: str
+    subproject: str
+    task: str
+    version: str
\ No newline at end of file
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from typing import Dict
+
+from utils.tracing import slowest_traces
+
+router = APIRouter()
+
+@router.get("/debug/slow")
+def slow(limit: int = 20, kind: str = "request") -> Dict:
+    """
+    최근 요청(또는 작업) 중 가장 느린 것들을 단계별 소요 시간과 함께 반환한다.
+
+    Args:
+        limit (int): 반환할 최대 개수
+        kind (str): request 또는 job
+
+    Returns:
+        Dict: 느린 순으로 정렬된 trace 목록
+    """
+    return {"traces": slowest_traces(limit, kind)}
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import json
+
+from utils.events import subscribe
+
+router = APIRouter()
+
+@router.get("/events")
+async def events(
+    project: Optional[str] = None,
+    subproject: Optional[str] = None,
+    task: Optional[str] = None,
+    version: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    작업 이벤트 스트림(SSE) 엔드포인트
+
+    Args:
+        project, subproject, task, version: 구독 필터 (생략 시 전체)
+        last_event_id: 이 id("<boot>-<seq>") 이후의 이벤트부터 다시 받는다 (Last-Event-ID 헤더로도 전달 가능)
+            서버가 재시작되었거나 버퍼에서 밀려난 id면 reset 이벤트 후 남은 이벤트부터 다시 보낸다
+
+    Returns:
+        StreamingResponse: text/event-stream
+    """
+    start_id = last_event_id if last_event_id is not None else last_event_id_header
+
+    async def event_stream():
+        async for message in subscribe(start_id, project, subproject, task, version):
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield (
+                f"id: {message['id']}\n"
+                f"event: {message['event']}\n"
+                f"data: {json.dumps(message, ensure_ascii=False)}\n\n"
+            )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from typing import Dict
+
+from containers.docker_hosts import host_status
+from containers.sweep_scheduler import pending_trial_count
+
+router = APIRouter()
+
+@router.get("/healthz")
+def healthz() -> Dict:
+    """
+    liveness 엔드포인트. 프로세스가 요청을 처리할 수 있는지만 확인한다.
+    """
+    return {"status": "ok"}
+
+@router.get("/readyz")
+def readyz() -> JSONResponse:
+    """
+    readiness 엔드포인트. 백그라운드에서 갱신된 호스트 상태만 읽으므로 Docker 데몬을 호출하지 않는다.
+
+    Returns:
+        JSONResponse: 사용 가능한 호스트가 하나도 없으면 503
+    """
+    hosts = host_status()
+    ready = any(host["healthy"] for host in hosts)
+
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "hosts": hosts,
+        "gpu": {
+            "total_slots": sum(host["gpu_slots"] for host in hosts if host["healthy"]),
+            "free_slots": sum(host["free_gpu_slots"] for host in hosts),
+        },
+        "queue_depth": pending_trial_count() + sum(host["reserved_slots"] for host in hosts),
+    }
+
+    return JSONResponse(status_code=200 if ready else 503, content=body)
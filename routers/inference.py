@@ -2,20 +2,22 @@ from fastapi import APIRouter, HTTPException
 from typing import Dict
 from models.inference import InferenceRequest
 from containers.model_container import inference_model
-import subprocess
+from containers.docker_hosts import has_gpu_capacity
 
 import logging
 import os
 import shutil
 
 from utils import VOLUME_PATH
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Docker 호출과 배치 잠금 대기가 이벤트 루프를 막지 않도록 일반 함수(threadpool)로 둔다
 @router.post("/inference")
-async def inference(request: InferenceRequest) -> Dict:
+def inference(request: InferenceRequest) -> Dict:
     """
     추론 시작 엔드포인트
 
@@ -27,25 +29,20 @@ async def inference(request: InferenceRequest) -> Dict:
     """
 
     try:
-        # 현재 학습중이거나 예측중이면 예측 X
-        running_container_ids = subprocess.check_output(["docker", "ps", "-q"]).decode().strip().split()  # Split into list of IDs
-        for container_id in running_container_ids:
-            # Get the container name
-            container_name = subprocess.check_output([
-                "docker", "inspect", "--format={{.Name}}", container_id
-            ]).decode().strip().lstrip('/')  # Remove leading slash from name
-            if container_name.endswith('server') or container_name.endswith('_export') or container_name.endswith('_tensorboard'):
-                continue
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"{container_name} 컨테이너가 이미 예측 실행중"
-                )
+        # 모든 호스트에서 학습중이거나 예측중이면 예측 X
+        with span("admission"):
+            has_capacity = has_gpu_capacity()
+        if not has_capacity:
+            raise HTTPException(
+                status_code=400,
+                detail="모든 호스트에서 컨테이너가 이미 예측 실행중"
+            )
 
         # inference_result 폴더 제거
         inference_result_path = f"{VOLUME_PATH}/{request.project}/{request.subproject}/{request.task}/{request.version}/inference_result"
-        if os.path.exists(inference_result_path):
-            shutil.rmtree(inference_result_path)
+        with span("clear_inference_result"):
+            if os.path.exists(inference_result_path):
+                shutil.rmtree(inference_result_path)
 
         inference_model(request)
 
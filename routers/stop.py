@@ -1,21 +1,23 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict
-import docker
-import docker.errors
 import logging
 import os
-import shutil
 import threading
 
 thread_lock = threading.Lock()
 
 from models.stop import StopParams  # stopParams가 정의된 모델
+from containers.docker_hosts import find_container
+from containers.model_container import pop_stop_reason, request_stop
+from utils.weight_store import gc, promote
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 가중치 해시 계산이 오래 걸리므로 이벤트 루프를 막지 않도록 일반 함수(threadpool)로 둔다
 @router.post("/stop")
-async def stop(stop_params: StopParams) -> Dict:
+def stop(stop_params: StopParams) -> Dict:
     """
     학습 또는 추론용 컨테이너 종료 엔드포인트
 
@@ -33,14 +35,9 @@ async def stop(stop_params: StopParams) -> Dict:
         f"{stop_params.project}_{stop_params.subproject}_{stop_params.task}_{stop_params.version}_inference"
     )
 
-    # Docker 클라이언트 초기화
-    client = docker.from_env()
-
-    # 학습 컨테이너 종료 시도
-    try:
-        train_container = client.containers.get(train_container_name)
-    except docker.errors.NotFound:
-        train_container = None
+    # 학습 컨테이너 종료 시도 (컨테이너를 실행 중인 호스트에서 검색)
+    with span("find_container"):
+        _, train_container = find_container(train_container_name)
 
     if train_container:
         print("종료 컨테이너 발견")
@@ -64,38 +61,45 @@ async def stop(stop_params: StopParams) -> Dict:
 
                 print("best.pt와 last.pt의 размер이 같습니다.")
 
-                # 모델 파일 이동
-                os.makedirs(f"{version_path}/weights", exist_ok=True)
+                # 모델 파일을 blob 저장소에 넣고 weights 폴더에 하드 링크로 연결
                 best_pt_destination = f"{version_path}/weights/best.pt"
                 last_pt_destination = f"{version_path}/weights/last.pt"
 
-                shutil.move(best_pt_path, best_pt_destination)
-                shutil.move(last_pt_path, last_pt_destination)
+                with span("promote_weights"):
+                    promote(best_pt_path, best_pt_destination)
+                    promote(last_pt_path, last_pt_destination)
+                    # 덮어쓴 이전 가중치가 더 이상 참조되지 않으면 정리
+                    gc()
 
-            train_container.kill()
+            # 사용자가 중단한 학습은 exit code 137이어도 failed가 아닌 stopped로 발행된다
+            request_stop(train_container_name)
+            with span("kill"):
+                train_container.kill()
 
             return {
                 "status": "success",
                 "message": f"컨테이너({train_container_name}) 중단 완료"
             }
         except Exception as e:
+            pop_stop_reason(train_container_name)
             logger.exception(f"학습 컨테이너 종료 중 에러 발생: {e}")
             raise HTTPException(status_code=500, detail=f"학습 컨테이너 종료 중 오류 발생: {e}")
 
     # 학습 컨테이너가 없으면 추론 컨테이너 종료 시도
-    try:
-        inference_container = client.containers.get(inference_container_name)
-    except docker.errors.NotFound:
-        inference_container = None
+    with span("find_container"):
+        _, inference_container = find_container(inference_container_name)
 
     if inference_container:
         try:
-            inference_container.kill()
+            request_stop(inference_container_name)
+            with span("kill"):
+                inference_container.kill()
             return {
                 "status": "success",
                 "message": f"컨테이너({inference_container_name}) 중단 완료"
             }
         except Exception as e:
+            pop_stop_reason(inference_container_name)
             logger.exception(f"추론 컨테이너 종료 중 에러 발생: {e}")
             raise HTTPException(status_code=500, detail=f"추론 컨테이너 종료 중 오류 발생: {e}")
     else:
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException
+from typing import Dict
+
+from models.sweep import SweepRequest, SweepParams
+from containers.sweep_scheduler import start_sweep, get_sweep
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/sweep")
+def sweep(request: SweepRequest) -> Dict:
+    """
+    하이퍼파라미터 스윕 시작 엔드포인트
+
+    Args:
+        request (SweepRequest): 기본 학습 요청과 파라미터 공간
+
+    Returns:
+        Dict: 생성된 스윕 정보 (sweep_id, trial 목록)
+    """
+    try:
+        logger.info(f"[Sweep] 스윕 요청 수신: {request}")
+
+        return start_sweep(request)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+
+@router.get("/sweep/{sweep_id}")
+def sweep_status(sweep_id: str) -> Dict:
+    """
+    스윕 진행 상황과 리더보드 조회 엔드포인트
+    """
+    return get_sweep(sweep_id).summary()
+
+@router.post("/stop_sweep")
+def stop_sweep(params: SweepParams) -> Dict:
+    """
+    스윕 종료 엔드포인트. 대기 중인 trial은 취소하고 실행 중인 trial은 중단한다.
+    """
+    sweep = get_sweep(params.sweep_id)
+    sweep.stop()
+
+    return {
+        "status": "success",
+        "message": f"스윕({params.sweep_id}) 중단 완료"
+    }
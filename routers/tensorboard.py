@@ -5,8 +5,9 @@ from containers.tensorboard_container import create_tensorboard_container, stop_
 
 router = APIRouter()
 
+# 컨테이너 실행과 UI 준비 대기(최대 수십 초)가 이벤트 루프를 막지 않도록 일반 함수(threadpool)로 둔다
 @router.post("/run_tensorboard")
-async def run_tensorboard(request: TensorboardParams) -> Dict:
+def run_tensorboard(request: TensorboardParams) -> Dict:
     """
     Tensorboard 시작 엔드포인트
 
@@ -27,7 +28,7 @@ async def run_tensorboard(request: TensorboardParams) -> Dict:
         )
 
 @router.post("/stop_tensorboard")
-async def stop_tensorboard(request: TensorboardParams) -> Dict:
+def stop_tensorboard(request: TensorboardParams) -> Dict:
     """
     Tensorboard 종료 엔드포인트
 
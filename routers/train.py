@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict
-import subprocess
 
 from models.train import TrainRequest
 from containers.model_container import train_model
+from containers.docker_hosts import has_gpu_capacity
+from utils.dataset_cache import prefetch_dataset
+from utils.tracing import span
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -11,8 +13,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Docker 호출과 배치 잠금 대기가 이벤트 루프를 막지 않도록 일반 함수(threadpool)로 둔다
 @router.post("/train")
-async def train(request: TrainRequest) -> Dict:
+def train(request: TrainRequest) -> Dict:
     """
     학습 시작 엔드포인트.
 
@@ -26,20 +29,16 @@ async def train(request: TrainRequest) -> Dict:
     try:
         logger.info(f"[Train] 학습 요청 수신: {request}")
 
-        # 현재 학습중이거나 예측중인 컨테이너가 있으면 X
-        running_container_ids = subprocess.check_output(["docker", "ps", "-q"]).decode().strip().split()  # Split into list of IDs
-        for container_id in running_container_ids:
-            # Get the container name
-            container_name = subprocess.check_output([
-                "docker", "inspect", "--format={{.Name}}", container_id
-            ]).decode().strip().lstrip('/')  # Remove leading slash from name
-            if container_name.endswith('server') or container_name.endswith('_export') or container_name.endswith('_tensorboard'):
-                continue
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"{container_name} 컨테이너가 이미 학습 실행중"
-                )
+        # 모든 호스트에서 학습중이거나 예측중인 컨테이너가 있으면 X
+        with span("admission"):
+            has_capacity = has_gpu_capacity()
+        if not has_capacity:
+            # 현재 학습이 끝나면 재요청될 작업이므로 데이터셋을 미리 캐시해둔다
+            prefetch_dataset(request.project, request.subproject, request.task, request.version)
+            raise HTTPException(
+                status_code=400,
+                detail="모든 호스트에서 컨테이너가 이미 학습 실행중"
+            )
 
         train_model(request)
 
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from typing import Dict
+import logging
+
+from models.weights import WeightsParams
+from utils.weight_store import delete_weights
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.post("/delete_weights")
+def delete(params: WeightsParams) -> Dict:
+    """
+    버전의 가중치 삭제 엔드포인트. 다른 버전이 공유 중인 blob은 남겨둔다.
+
+    Args:
+        params (WeightsParams): 가중치를 삭제할 버전 정보
+
+    Returns:
+        Dict: 요청 처리 결과
+    """
+    weights_path = f"/moai/{params.project}/{params.subproject}/{params.task}/{params.version}/weights"
+
+    try:
+        result = delete_weights(weights_path)
+        logger.info(f"[WEIGHTS] {weights_path} 삭제: {result}")
+
+        return {
+            "status": "success",
+            "message": f"가중치({weights_path}) 삭제 완료",
+            **result
+        }
+
+    except Exception as e:
+        logger.exception(f"가중치 삭제 중 에러 발생: {e}")
+        raise HTTPException(status_code=500, detail=f"가중치 삭제 중 오류 발생: {e}")
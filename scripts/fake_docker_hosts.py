@@ -0,0 +1,269 @@
+"""
+가짜 Docker 엔진 두 개로 여러 호스트 배치를 확인하는 하네스
+
+실제 GPU 서버 없이 containers/docker_hosts.py의 배치, GPU 슬롯 예약, 슬롯 label 집계,
+find_container의 호스트 탐색, 응답 없는 호스트 처리를 확인한다.
+각 엔진은 임시 폴더의 unix 소켓에서 docker-py가 사용하는 Engine API 일부만 흉내 낸다.
+
+사용법 (저장소 루트에서, docker 패키지가 설치된 환경):
+    python scripts/fake_docker_hosts.py
+
+호스트 구성:
+    gpu1: gpu_slots=1, gpus 없음 (슬롯 하나가 모든 GPU 사용)
+    gpu2: gpu_slots=2, gpus=["0", "1", "2", "3"] (슬롯마다 GPU 2개)
+"""
+import http.server
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+API_VERSION = "1.45"
+
+
+class FakeEngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class FakeEngineHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # unix 소켓에는 client_address가 없어 기본 로그 형식을 쓸 수 없다
+        pass
+
+    def send_json(self, status, body=None):
+        data = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def route(self):
+        engine = self.server.engine
+        if engine.hang:
+            # 연결은 받지만 응답하지 않는 호스트
+            time.sleep(60)
+
+        url = urllib.parse.urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts and parts[0].startswith("v1."):
+            parts = parts[1:]
+        query = urllib.parse.parse_qs(url.query)
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"null") if length else None
+
+        return engine.handle(self.command, parts, query, body)
+
+    def do_request(self):
+        status, body = self.route()
+        if isinstance(body, str):
+            data = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self.send_json(status, body)
+
+    do_GET = do_request
+    do_POST = do_request
+    do_DELETE = do_request
+
+
+class FakeEngine:
+    """컨테이너 생성/조회/종료와 ping만 지원하는 Docker 엔진"""
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.containers = {}
+        self.hang = False
+        self.server = None
+
+    def start(self):
+        self.server = FakeEngineServer(self.socket_path, FakeEngineHandler)
+        self.server.engine = self
+        server_thread = threading.Thread(target=self.server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.remove(self.socket_path)
+
+    def find(self, id_or_name):
+        for container in self.containers.values():
+            if id_or_name in (container["Id"], container["Name"].lstrip("/")):
+                return container
+        return None
+
+    def handle(self, method, parts, query, body):
+        if parts == ["version"]:
+            return 200, {"ApiVersion": API_VERSION, "Version": "fake"}
+        if parts == ["_ping"]:
+            return 200, "OK"
+
+        if method == "GET" and parts == ["containers", "json"]:
+            show_all = query.get("all", ["0"])[0] in ("1", "true", "True")
+            return 200, [
+                {
+                    "Id": c["Id"],
+                    "Names": [c["Name"]],
+                    "Labels": c["Config"]["Labels"],
+                    "State": c["State"]["Status"],
+                }
+                for c in self.containers.values()
+                if show_all or c["State"]["Running"]
+            ]
+
+        if method == "POST" and parts == ["containers", "create"]:
+            container_id = uuid.uuid4().hex
+            self.containers[container_id] = {
+                "Id": container_id,
+                "Name": f"/{query['name'][0]}",
+                "Config": {"Image": body.get("Image"), "Labels": body.get("Labels") or {}},
+                "HostConfig": body.get("HostConfig") or {},
+                "State": {"Status": "created", "Running": False},
+            }
+            return 201, {"Id": container_id, "Warnings": []}
+
+        if len(parts) >= 2 and parts[0] == "containers":
+            container = self.find(parts[1])
+            if container is None:
+                return 404, {"message": f"No such container: {parts[1]}"}
+
+            action = parts[2] if len(parts) > 2 else None
+            if method == "GET" and action == "json":
+                return 200, container
+            if method == "POST" and action == "start":
+                container["State"] = {"Status": "running", "Running": True}
+                return 204, None
+            if method == "POST" and action in ("kill", "stop"):
+                container["State"] = {"Status": "exited", "Running": False}
+                return 204, None
+            if method == "DELETE" and action is None:
+                del self.containers[container["Id"]]
+                return 204, None
+
+        return 404, {"message": f"지원하지 않는 요청: {method} /{'/'.join(parts)}"}
+
+
+def check(description, condition):
+    print(f"[{'OK' if condition else 'FAIL'}] {description}")
+    if not condition:
+        sys.exit(1)
+
+
+def run_container(docker_hosts, host, slot, name):
+    import docker.types
+
+    device_ids = host.slot_device_ids(slot)
+    if device_ids is None:
+        device_request = docker.types.DeviceRequest(count=-1, capabilities=[["gpu"]])
+    else:
+        device_request = docker.types.DeviceRequest(device_ids=device_ids, capabilities=[["gpu"]])
+
+    return host.client.containers.run(
+        image="yolo:latest",
+        name=name,
+        labels={docker_hosts.GPU_SLOT_LABEL: str(slot)},
+        device_requests=[device_request],
+        detach=True,
+    )
+
+
+def main():
+    temp_path = tempfile.mkdtemp(prefix="moai_fake_docker_")
+    engines = {
+        "gpu1": FakeEngine(f"{temp_path}/gpu1.sock"),
+        "gpu2": FakeEngine(f"{temp_path}/gpu2.sock"),
+    }
+    for engine in engines.values():
+        engine.start()
+
+    # docker_hosts는 import 시점에 호스트 목록을 읽으므로 먼저 설정한다
+    os.environ["MOAI_DOCKER_HOSTS"] = json.dumps([
+        {"name": "gpu1", "base_url": f"unix://{engines['gpu1'].socket_path}", "gpu_slots": 1},
+        {"name": "gpu2", "base_url": f"unix://{engines['gpu2'].socket_path}", "gpu_slots": 2,
+         "gpus": ["0", "1", "2", "3"], "volume_path": "/data/MOAI/Project"},
+    ])
+    sys.path.insert(0, ROOT_PATH)
+
+    from fastapi import HTTPException
+    from containers import docker_hosts
+
+    gpu1, gpu2 = docker_hosts.hosts["gpu1"], docker_hosts.hosts["gpu2"]
+
+    # [1] 백그라운드 모니터 대신 직접 health check
+    for host in docker_hosts.hosts.values():
+        host.check_health(force=True)
+    check("두 호스트 모두 healthy", gpu1.healthy and gpu2.healthy)
+    check("호스트별 volume_path", gpu1.volume_path != gpu2.volume_path)
+
+    # [2] 세 슬롯을 모두 예약하면 서로 다른 (호스트, 슬롯)이 배정되고 네 번째는 거절
+    placements = [docker_hosts.reserve_host() for _ in range(3)]
+    check("슬롯 3개 배정", sorted((host.name, slot) for host, slot in placements) == [("gpu1", 0), ("gpu2", 0), ("gpu2", 1)])
+    check("남은 GPU 여유 없음", not docker_hosts.has_gpu_capacity())
+    try:
+        docker_hosts.reserve_host()
+        check("네 번째 예약 거절", False)
+    except HTTPException as e:
+        check("네 번째 예약 거절", e.status_code == 503)
+    check("GPU 슬롯이 필요 없는 작업은 배치 가능", docker_hosts.reserve_host(gpu_slot=False)[1] is None)
+
+    # [3] 컨테이너를 띄우고 예약을 반환해도 슬롯 label로 사용 중임을 안다 (서버 재시작 상황)
+    for index, (host, slot) in enumerate(placements):
+        run_container(docker_hosts, host, slot, f"p_s_t_v{index}_train")
+        docker_hosts.release_host(host, slot)
+    check("label로 슬롯 사용 집계", not docker_hosts.has_gpu_capacity())
+
+    device_ids = sorted(
+        tuple(c["HostConfig"]["DeviceRequests"][0]["DeviceIDs"])
+        for c in engines["gpu2"].containers.values()
+    )
+    check("gpu2 슬롯별 device_ids", device_ids == [("0", "1"), ("2", "3")])
+
+    # [4] find_container는 컨테이너가 있는 호스트를 찾는다
+    gpu2_name = next(c["Name"].lstrip("/") for c in engines["gpu2"].containers.values())
+    host, container = docker_hosts.find_container(gpu2_name)
+    check("find_container 호스트 탐색", host is gpu2 and container.name == gpu2_name)
+    check("없는 컨테이너는 (None, None)", docker_hosts.find_container("missing_train") == (None, None))
+
+    # [5] 종료된 컨테이너의 슬롯은 다시 배정된다
+    killed_slot = int(container.labels[docker_hosts.GPU_SLOT_LABEL])
+    container.kill()
+    host, slot = docker_hosts.reserve_host()
+    check("종료된 슬롯 재배정", host is gpu2 and slot == killed_slot)
+    docker_hosts.release_host(host, slot)
+
+    # [6] 응답하지 않는 호스트는 DOCKER_PROBE_TIMEOUT 안에 unhealthy가 되고 배치에서 빠진다
+    engines["gpu1"].hang = True
+    started_at = time.time()
+    gpu1.check_health(force=True)
+    elapsed = time.time() - started_at
+    check(f"응답 없는 호스트 unhealthy ({elapsed:.1f}s)", not gpu1.healthy and elapsed < docker_hosts.DOCKER_PROBE_TIMEOUT + 2)
+    check("unhealthy 호스트 제외", docker_hosts.healthy_hosts() == [gpu2])
+    engines["gpu1"].hang = False
+
+    # [7] 소켓이 사라진 호스트
+    engines["gpu1"].stop()
+    gpu1.check_health(force=True)
+    check("중지된 호스트 unhealthy", not gpu1.healthy)
+
+    engines["gpu2"].stop()
+    print("모든 확인 완료")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,11 @@
 import os
 
-VOLUME_PATH = "d:/MOAI/Project"
\ No newline at end of file
+VOLUME_PATH = "d:/MOAI/Project"
+
+# 로컬 SSD 데이터셋 캐시 (호스트 기준 경로 / 서버 컨테이너 기준 경로)
+# 서버 컨테이너 실행 시 호스트 경로를 캐시 경로로 바인드해야 한다.
+#   docker run -v d:/MOAI/DatasetCache:/moai_cache ...
+# 바인드되지 않으면(os.path.ismount가 False) 캐시를 쓰지 않고 /moai에서 바로 읽는다.
+DATASET_CACHE_HOST_PATH = os.environ.get("MOAI_DATASET_CACHE_HOST_PATH", "d:/MOAI/DatasetCache")
+DATASET_CACHE_PATH = os.environ.get("MOAI_DATASET_CACHE_PATH", "/moai_cache")
+DATASET_CACHE_MAX_BYTES = int(os.environ.get("MOAI_DATASET_CACHE_MAX_BYTES", str(500 * 1024 ** 3)))
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from utils import DATASET_CACHE_HOST_PATH, DATASET_CACHE_PATH, DATASET_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# 학습 컨테이너 내부에서 캐시된 데이터셋이 마운트되는 경로
+DATASET_MOUNT_PATH = "/moai_dataset"
+
+cache_lock = threading.Lock()
+entry_locks = {}
+pinned_entries = {}
+prefetching_entries = set()
+
+
+def dataset_source_path(project: str, subproject: str, task: str, version: str) -> str:
+    return f"/moai/{project}/{subproject}/{task}/{version}/dataset"
+
+
+def entry_name(project: str, subproject: str, task: str, version: str) -> str:
+    # 데이터셋 폴더를 심볼릭 링크로 공유하는 버전(스윕 trial 등)은 같은 캐시 항목을 사용한다
+    src_path = os.path.realpath(dataset_source_path(project, subproject, task, version))
+    return os.path.relpath(os.path.dirname(src_path), "/moai").replace("/", "_")
+
+
+def dataset_cache_available() -> bool:
+    """
+    캐시 경로가 호스트 디렉터리로 마운트되어 있는지 확인한다.
+    마운트되지 않았으면 서버 컨테이너 내부에만 복사되고 학습 컨테이너에는 빈 폴더가 보이므로 캐시를 쓰지 않는다.
+    """
+    return os.path.ismount(DATASET_CACHE_PATH)
+
+
+def can_stage_dataset(project: str, subproject: str, task: str, version: str) -> bool:
+    return dataset_cache_available() and os.path.isdir(dataset_source_path(project, subproject, task, version))
+
+
+def build_manifest(src_path: str) -> dict:
+    """
+    데이터셋 폴더의 manifest(상대 경로 -> [크기, 수정 시각])를 만든다.
+    네트워크 공유에서 전체 파일을 해싱하지 않도록 크기와 mtime으로 변경 여부를 판단한다.
+    """
+    manifest = {}
+    for root, _, files in os.walk(src_path):
+        for name in files:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            manifest[os.path.relpath(path, src_path)] = [stat.st_size, stat.st_mtime_ns]
+    return manifest
+
+
+def manifest_key(manifest: dict) -> str:
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()
+
+
+def get_entry_lock(entry: str) -> threading.Lock:
+    with cache_lock:
+        if entry not in entry_locks:
+            entry_locks[entry] = threading.Lock()
+        return entry_locks[entry]
+
+
+def pin(entry: str):
+    """학습 중인 캐시 항목은 eviction 대상에서 제외한다."""
+    with cache_lock:
+        pinned_entries[entry] = pinned_entries.get(entry, 0) + 1
+
+
+def unpin(entry: str):
+    with cache_lock:
+        count = pinned_entries.get(entry, 0) - 1
+        if count > 0:
+            pinned_entries[entry] = count
+        else:
+            pinned_entries.pop(entry, None)
+
+
+def load_cached_manifest(entry_path: str) -> dict:
+    manifest_path = f"{entry_path}/manifest.json"
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # 없거나 읽을 수 없는 manifest는 전체 재동기화 대상으로 본다
+        return {"key": None, "files": {}}
+
+
+def write_manifest(entry_path: str, manifest: dict):
+    # evict()가 동시에 읽어도 절반만 쓰인 파일을 보지 않도록 임시 파일에 쓴 뒤 교체한다
+    tmp_path = f"{entry_path}/manifest.json.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, f"{entry_path}/manifest.json")
+
+
+def sync_entry(src_path: str, entry_path: str, manifest: dict, cached_files: dict):
+    """변경된 파일만 복사하고 원본에서 사라진 파일은 캐시에서도 지운다."""
+    data_path = f"{entry_path}/data"
+    copied = 0
+
+    for rel_path, meta in manifest.items():
+        dest = os.path.join(data_path, rel_path)
+        if cached_files.get(rel_path) == meta and os.path.exists(dest):
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copy2(os.path.join(src_path, rel_path), dest)
+        copied += 1
+
+    for rel_path in cached_files:
+        if rel_path not in manifest:
+            dest = os.path.join(data_path, rel_path)
+            if os.path.exists(dest):
+                os.remove(dest)
+
+    return copied
+
+
+def stage_dataset(project: str, subproject: str, task: str, version: str):
+    """
+    버전의 데이터셋을 로컬 캐시로 동기화한다.
+
+    Args:
+        project, subproject, task, version: 데이터셋을 식별하는 정보
+
+    Returns:
+        str | None: 학습 컨테이너에 마운트할 호스트 경로. 데이터셋 폴더가 없으면 None
+    """
+    src_path = dataset_source_path(project, subproject, task, version)
+    if not can_stage_dataset(project, subproject, task, version):
+        logger.info(f"[DATASET] 캐시 볼륨 또는 데이터셋 폴더가 없어 캐시를 건너뜁니다: {src_path}")
+        return None
+
+    entry = entry_name(project, subproject, task, version)
+    entry_path = f"{DATASET_CACHE_PATH}/{entry}"
+
+    with get_entry_lock(entry):
+        manifest = build_manifest(src_path)
+        key = manifest_key(manifest)
+        cached = load_cached_manifest(entry_path)
+
+        if cached["key"] == key:
+            logger.info(f"[DATASET] 캐시 적중: {entry}")
+        else:
+            started_at = time.time()
+            if cached["key"] is None:
+                # manifest가 없으면 data에 남은 파일 중 원본에서 지워진 것을 알 수 없으므로 비우고 다시 받는다
+                shutil.rmtree(f"{entry_path}/data", ignore_errors=True)
+            os.makedirs(f"{entry_path}/data", exist_ok=True)
+            copied = sync_entry(src_path, entry_path, manifest, cached["files"])
+
+            size = sum(meta[0] for meta in manifest.values())
+            write_manifest(entry_path, {"key": key, "size": size, "files": manifest})
+            logger.info(
+                f"[DATASET] {entry} 동기화 완료: {copied}/{len(manifest)}개 파일 복사 "
+                f"({time.time() - started_at:.1f}s)"
+            )
+
+        # LRU 기준 시각 갱신
+        os.utime(f"{entry_path}/manifest.json")
+
+    evict(exclude={entry})
+
+    return f"{DATASET_CACHE_HOST_PATH}/{entry}/data"
+
+
+def evict(exclude=frozenset()):
+    """
+    캐시 크기가 DATASET_CACHE_MAX_BYTES를 넘으면 오래 사용하지 않은 항목부터 제거한다.
+    """
+    if not os.path.isdir(DATASET_CACHE_PATH):
+        return
+
+    entries = []
+    total_size = 0
+    for entry in os.listdir(DATASET_CACHE_PATH):
+        manifest_path = f"{DATASET_CACHE_PATH}/{entry}/manifest.json"
+        try:
+            last_used = os.path.getmtime(manifest_path)
+            with open(manifest_path, "r") as f:
+                size = json.load(f).get("size", 0)
+        except OSError:
+            continue
+        except ValueError:
+            # 읽을 수 없는 manifest는 크기 0으로 취급
+            size = 0
+        entries.append((last_used, entry, size))
+        total_size += size
+
+    for _, entry, size in sorted(entries):
+        if total_size <= DATASET_CACHE_MAX_BYTES:
+            break
+        with cache_lock:
+            in_use = entry in exclude or entry in pinned_entries or entry in prefetching_entries
+        if in_use:
+            continue
+
+        with get_entry_lock(entry):
+            shutil.rmtree(f"{DATASET_CACHE_PATH}/{entry}", ignore_errors=True)
+        total_size -= size
+        logger.info(f"[DATASET] LRU eviction: {entry}")
+
+
+def prefetch_dataset(project: str, subproject: str, task: str, version: str):
+    """
+    현재 학습이 진행되는 동안 다음 학습의 데이터셋을 백그라운드에서 미리 캐시한다.
+    """
+    entry = entry_name(project, subproject, task, version)
+    with cache_lock:
+        if entry in prefetching_entries:
+            return
+        prefetching_entries.add(entry)
+
+    def run_prefetch():
+        try:
+            stage_dataset(project, subproject, task, version)
+        except Exception as e:
+            logger.error(f"[DATASET] prefetch 실패({entry}): {e}")
+        finally:
+            with cache_lock:
+                prefetching_entries.discard(entry)
+
+    prefetch_thread = threading.Thread(target=run_prefetch)
+    prefetch_thread.daemon = True
+    prefetch_thread.start()
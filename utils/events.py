@@ -0,0 +1,134 @@
+import asyncio
+import collections
+import threading
+import time
+import uuid
+
+# 재접속(resume)을 위해 메모리에 보관하는 최근 이벤트 수
+EVENT_BUFFER_SIZE = 1000
+
+# 새 이벤트가 없을 때 keep-alive를 보내는 간격(초)
+KEEPALIVE_INTERVAL = 15
+
+# 프로세스마다 달라지는 값. 이벤트 id("<boot>-<seq>")에 넣어 재시작 전 id로 재접속한 경우를 구분한다
+BOOT_ID = uuid.uuid4().hex[:8]
+
+event_lock = threading.Lock()
+event_buffer = collections.deque(maxlen=EVENT_BUFFER_SIZE)
+subscribers = set()
+last_event_seq = 0
+
+
+def publish(event: str, job: str, project: str, subproject: str, task: str, version: str, **data) -> dict:
+    """
+    작업 라이프사이클 이벤트를 발행한다. 학습/추론 스레드에서 호출해도 안전하다.
+
+    Args:
+        event (str): queued, started, progress, finished, failed, stopped(/stop 등으로 종료, reason 포함)
+        job (str): train, inference, export
+        project, subproject, task, version: 작업을 식별하는 정보
+        **data: exit_code, artifacts 등 추가 정보
+
+    Returns:
+        dict: 발행된 이벤트
+    """
+    global last_event_seq
+
+    with event_lock:
+        last_event_seq += 1
+        message = {
+            "id": f"{BOOT_ID}-{last_event_seq}",
+            "seq": last_event_seq,
+            "event": event,
+            "job": job,
+            "project": project,
+            "subproject": subproject,
+            "task": task,
+            "version": version,
+            "timestamp": time.time(),
+            **data,
+        }
+        event_buffer.append(message)
+        waiting = list(subscribers)
+
+    # 구독자는 asyncio 루프에서 대기하므로 스레드 안전하게 깨운다
+    for loop, waiter in waiting:
+        try:
+            loop.call_soon_threadsafe(waiter.set)
+        except RuntimeError:
+            pass
+
+    return message
+
+
+def events_after(seq: int) -> list:
+    with event_lock:
+        return [message for message in event_buffer if message["seq"] > seq]
+
+
+def resume_seq(last_event_id):
+    """
+    클라이언트가 보낸 Last-Event-ID를 이 프로세스의 seq로 바꾼다.
+
+    Returns:
+        tuple: (이어서 보낼 seq, reset 이벤트를 보내야 하는지 여부)
+    """
+    if not last_event_id:
+        return 0, False
+
+    boot_id, _, seq = last_event_id.partition("-")
+    if boot_id != BOOT_ID or not seq.isdigit():
+        # 재시작 전 id이거나 알 수 없는 형식이면 처음부터 다시 보낸다
+        return 0, True
+
+    seq = int(seq)
+    with event_lock:
+        oldest_seq = event_buffer[0]["seq"] if event_buffer else last_event_seq + 1
+    if seq < oldest_seq - 1:
+        # 버퍼에서 이미 밀려난 이벤트가 있으면 남아 있는 것부터 다시 보낸다
+        return 0, True
+    return seq, False
+
+
+def matches(message: dict, project=None, subproject=None, task=None, version=None) -> bool:
+    filters = {"project": project, "subproject": subproject, "task": task, "version": version}
+    return all(value is None or message[key] == value for key, value in filters.items())
+
+
+async def subscribe(last_event_id=None, project=None, subproject=None, task=None, version=None):
+    """
+    last_event_id 이후의 이벤트를 필터에 맞게 순서대로 흘려보낸다.
+    이어서 보낼 수 없는 id면 reset 이벤트를 먼저 보내고 버퍼에 남은 이벤트부터 다시 보낸다.
+    KEEPALIVE_INTERVAL 동안 새 이벤트가 없으면 None을 보낸다.
+    """
+    last_seq, reset = resume_seq(last_event_id)
+    if reset:
+        yield {"id": f"{BOOT_ID}-0", "event": "reset", "boot_id": BOOT_ID}
+
+    loop = asyncio.get_running_loop()
+    waiter = asyncio.Event()
+    subscriber = (loop, waiter)
+
+    with event_lock:
+        subscribers.add(subscriber)
+
+    try:
+        while True:
+            waiter.clear()
+            pending = events_after(last_seq)
+
+            for message in pending:
+                last_seq = message["seq"]
+                if matches(message, project, subproject, task, version):
+                    yield message
+
+            if pending:
+                continue
+
+            try:
+                await asyncio.wait_for(waiter.wait(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield None
+    finally:
+        with event_lock:
+            subscribers.discard(subscriber)
@@ -1,8 +1,8 @@
-import docker
+from containers.docker_hosts import healthy_hosts
 
 def get_running_container():
-    client = docker.from_env()
-
-    running_containers = client.containers.list(all=False)
+    running_containers = []
+    for host in healthy_hosts():
+        running_containers.extend(host.client.containers.list(all=False))
 
     return running_containers
\ No newline at end of file
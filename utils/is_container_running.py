@@ -1,8 +1,6 @@
-import docker
+from utils.get_running_container import get_running_container
 
 def is_container_running():
-    client = docker.from_env()
-
-    running_container = client.containers.list(all=False)
+    running_container = get_running_container()
 
     return len(running_container) > 0
\ No newline at end of file
@@ -0,0 +1,234 @@
+import collections
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# 내보낼 trace 비율 (0.0 ~ 1.0). 오류가 난 trace는 항상 내보낸다.
+TRACE_SAMPLE_RATE = float(os.environ.get("MOAI_TRACE_SAMPLE_RATE", "0.1"))
+
+# JSONL 파일 경로 (빈 문자열이면 기록하지 않음)
+TRACE_JSONL_PATH = os.environ.get("MOAI_TRACE_JSONL_PATH", "/moai/.traces/traces.jsonl")
+
+# OTLP/HTTP(JSON) 수집기 주소. 예: http://otel-collector:4318/v1/traces
+TRACE_OTLP_ENDPOINT = os.environ.get("MOAI_TRACE_OTLP_ENDPOINT", "")
+
+# /debug/slow 조회용으로 메모리에 보관하는 최근 trace 수 (샘플링과 무관하게 모두 보관)
+RECENT_TRACE_SIZE = 500
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+current_span_id = contextvars.ContextVar("current_span_id", default=None)
+
+recent_lock = threading.Lock()
+recent_traces = collections.deque(maxlen=RECENT_TRACE_SIZE)
+
+export_queue = queue.Queue(maxsize=1000)
+exporter_lock = threading.Lock()
+exporter_thread = None
+
+
+def new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Trace:
+    def __init__(self, name, kind, trace_id=None, parent_span_id=None, sampled=None, **attributes):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.name = name
+        self.kind = kind
+        self.parent_span_id = parent_span_id
+        self.attributes = attributes
+        self.root_span_id = new_span_id()
+        self.spans = []
+        # 이어지는 trace는 부모의 샘플링 결과를 따라야 요청과 작업 trace가 함께 남는다
+        self.sampled = sampled if sampled is not None else random.random() < TRACE_SAMPLE_RATE
+        self.error = None
+        self.start = time.time()
+        self.end = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.time()
+        return round((end - self.start) * 1000, 2)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "attributes": self.attributes,
+            "spans": [
+                {key: value for key, value in span.items() if key != "end"}
+                for span in self.spans
+            ],
+        }
+
+
+@contextlib.contextmanager
+def start_trace(name: str, kind: str = "request", trace_id=None, parent_span_id=None, sampled=None, **attributes):
+    """
+    요청 또는 작업 단위의 trace를 시작한다. 내부에서 span()으로 단계별 시간을 기록한다.
+
+    Args:
+        name (str): trace 이름 (예: "POST /train", "train.job")
+        kind (str): request 또는 job
+        trace_id (str | None): 요청 id. 학습 스레드처럼 요청과 이어지는 작업은 같은 id를 넘긴다
+        parent_span_id (str | None): 이어지는 요청의 root span id
+        sampled (bool | None): 이어지는 요청의 샘플링 여부. None이면 TRACE_SAMPLE_RATE로 새로 정한다
+    """
+    trace = Trace(name, kind, trace_id, parent_span_id, sampled, **attributes)
+    trace_token = current_trace.set(trace)
+    span_token = current_span_id.set(trace.root_span_id)
+    try:
+        yield trace
+    except Exception as e:
+        trace.error = str(e)
+        raise
+    finally:
+        trace.end = time.time()
+        current_span_id.reset(span_token)
+        current_trace.reset(trace_token)
+        finish_trace(trace)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """
+    현재 trace 안에서 한 단계의 소요 시간을 기록한다. trace 밖에서 호출하면 아무것도 하지 않는다.
+    """
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    record = {
+        "span_id": new_span_id(),
+        "parent_span_id": current_span_id.get(),
+        "name": name,
+        "start": time.time(),
+        "attributes": attributes,
+    }
+    token = current_span_id.set(record["span_id"])
+    try:
+        yield
+    except Exception as e:
+        record["error"] = str(e)
+        raise
+    finally:
+        current_span_id.reset(token)
+        record["end"] = time.time()
+        record["duration_ms"] = round((record["end"] - record["start"]) * 1000, 2)
+        trace.spans.append(record)
+
+
+def current_trace_context():
+    """별도 스레드로 넘길 (trace_id, span_id, sampled). trace 밖이면 (None, None, None)"""
+    trace = current_trace.get()
+    if trace is None:
+        return None, None, None
+    return trace.trace_id, current_span_id.get(), trace.sampled
+
+
+def finish_trace(trace: Trace):
+    # 예외가 span 안에서 처리되어 trace까지 올라오지 않은 경우에도 오류 trace로 본다
+    if trace.error is None:
+        trace.error = next((record["error"] for record in trace.spans if "error" in record), None)
+
+    with recent_lock:
+        recent_traces.append(trace)
+
+    if trace.sampled or trace.error is not None:
+        ensure_exporter()
+        try:
+            export_queue.put_nowait(trace)
+        except queue.Full:
+            logger.warning("[TRACE] export 대기열이 가득 차 trace를 버립니다.")
+
+
+def slowest_traces(limit: int = 20, kind: str = "request") -> list:
+    with recent_lock:
+        traces = [trace for trace in recent_traces if trace.kind == kind]
+    traces.sort(key=lambda trace: trace.duration_ms, reverse=True)
+    return [trace.to_dict() for trace in traces[:limit]]
+
+
+def write_jsonl(trace: Trace):
+    os.makedirs(os.path.dirname(TRACE_JSONL_PATH), exist_ok=True)
+    with open(TRACE_JSONL_PATH, "a") as f:
+        f.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+
+
+def otlp_attributes(attributes: dict) -> list:
+    return [{"key": key, "value": {"stringValue": str(value)}} for key, value in attributes.items()]
+
+
+def otlp_span(trace: Trace, span_id, parent_span_id, name, start, end, attributes, error) -> dict:
+    otlp = {
+        "traceId": trace.trace_id,
+        "spanId": span_id,
+        "name": name,
+        "kind": 2 if trace.kind == "request" else 1,  # SERVER / INTERNAL
+        "startTimeUnixNano": str(int(start * 1e9)),
+        "endTimeUnixNano": str(int(end * 1e9)),
+        "attributes": otlp_attributes(attributes),
+        "status": {"code": 2, "message": error} if error else {"code": 1},
+    }
+    if parent_span_id:
+        otlp["parentSpanId"] = parent_span_id
+    return otlp
+
+
+def send_otlp(trace: Trace):
+    import requests
+
+    spans = [otlp_span(
+        trace, trace.root_span_id, trace.parent_span_id, trace.name,
+        trace.start, trace.end, trace.attributes, trace.error,
+    )]
+    for record in trace.spans:
+        spans.append(otlp_span(
+            trace, record["span_id"], record["parent_span_id"], record["name"],
+            record["start"], record["end"], record["attributes"], record.get("error"),
+        ))
+
+    payload = {
+        "resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({"service.name": "moai-server"})},
+            "scopeSpans": [{"scope": {"name": "moai.tracing"}, "spans": spans}],
+        }]
+    }
+    requests.post(TRACE_OTLP_ENDPOINT, json=payload, timeout=5)
+
+
+def run_exporter():
+    while True:
+        trace = export_queue.get()
+        try:
+            if TRACE_JSONL_PATH:
+                write_jsonl(trace)
+            if TRACE_OTLP_ENDPOINT:
+                send_otlp(trace)
+        except Exception as e:
+            logger.warning(f"[TRACE] trace export 실패: {e}")
+
+
+def ensure_exporter():
+    """요청 처리 스레드가 파일/네트워크 I/O를 기다리지 않도록 별도 스레드에서 내보낸다."""
+    global exporter_thread
+
+    with exporter_lock:
+        if exporter_thread is None:
+            exporter_thread = threading.Thread(target=run_exporter)
+            exporter_thread.daemon = True  # 메인 스레드 종료 시 함께 종료
+            exporter_thread.start()
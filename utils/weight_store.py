@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows에서는 reflink를 쓰지 않는다
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 가중치 blob 저장소 경로. 하드 링크를 위해 반드시 버전 폴더와 같은 볼륨(/moai) 안에 있어야 한다.
+BLOB_STORE_PATH = "/moai/.blobs/sha256"
+
+# 해시 계산 시 한 번에 읽는 크기 (수 GB 체크포인트도 메모리에 올리지 않는다)
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Linux ioctl FICLONE (linux/fs.h). 파이썬 버전에 따라 fcntl 모듈에 상수가 없을 수 있다
+FICLONE = getattr(fcntl, "FICLONE", 0x40049409)
+
+# reflink로 연결한 weights 파일 옆에 두는 참조 표시 파일 접미사.
+# blob의 하드 링크라서 st_nlink로 참조 수를 세는 gc()가 그대로 동작한다.
+BLOB_REF_SUFFIX = ".blobref"
+
+# promote()가 저장과 링크를 한 번에 잠그므로 재진입 가능한 잠금을 쓴다
+store_lock = threading.RLock()
+
+
+def hash_file(path: str) -> str:
+    """
+    파일을 스트리밍으로 읽어 sha256 해시를 계산한다.
+
+    Args:
+        path (str): 해시를 계산할 파일 경로
+
+    Returns:
+        str: sha256 hex digest
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def blob_path(digest: str) -> str:
+    # 한 폴더에 파일이 몰리지 않도록 앞 2글자로 샤딩
+    return f"{BLOB_STORE_PATH}/{digest[:2]}/{digest}"
+
+
+def store_blob(src_path: str, digest: str) -> str:
+    """
+    파일을 blob 저장소로 옮긴다. store_lock을 잡은 상태에서 호출해야 한다.
+    동일한 내용의 blob이 이미 있으면 원본 파일은 삭제되고 기존 blob을 재사용한다.
+
+    Args:
+        src_path (str): 저장할 파일 경로 (호출 후 원본은 남지 않는다)
+        digest (str): hash_file()로 미리 계산한 sha256 digest
+
+    Returns:
+        str: blob 경로
+    """
+    dest = blob_path(digest)
+
+    if os.path.exists(dest):
+        os.remove(src_path)
+        logger.info(f"[WEIGHTS] 중복 가중치 발견, 기존 blob 재사용: {digest}")
+    else:
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # 같은 볼륨이면 rename이므로 복사 비용이 없다
+        shutil.move(src_path, dest)
+        # blob은 여러 버전이 공유하므로 읽기 전용으로 둔다
+        os.chmod(dest, 0o444)
+        logger.info(f"[WEIGHTS] 새 blob 저장: {digest}")
+
+    return dest
+
+
+def ref_path(dest_path: str) -> str:
+    return f"{os.path.dirname(dest_path)}/.{os.path.basename(dest_path)}{BLOB_REF_SUFFIX}"
+
+
+def reflink(src_path: str, dest_path: str):
+    """
+    src_path를 dest_path로 reflink(copy-on-write) 복제한다. 블록은 공유하지만 inode는 따로라
+    한쪽을 덮어써도 다른 쪽은 바뀌지 않는다. (btrfs, XFS reflink=1 등에서만 가능, 아니면 OSError)
+    """
+    if fcntl is None:
+        raise OSError("reflink를 지원하지 않는 플랫폼입니다.")
+
+    try:
+        with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+            fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        raise
+
+
+def materialize(digest: str, dest_path: str):
+    """
+    blob을 버전 폴더의 weights 경로에 연결한다. reflink를 먼저 시도하고, 안 되면 하드 링크를 건다.
+    둘 다 불가능하면 OSError를 그대로 올린다. (복사본을 만들면 디스크를 두 배로 쓰게 된다)
+
+    주의: 하드 링크로 연결된 weights 파일은 모든 버전이 같은 inode를 공유한다.
+    0o444 권한은 root로 실행되는 컨테이너를 막지 못하므로, 어느 버전에서든 파일을 제자리에서 덮어쓰면
+    같은 blob을 쓰는 모든 버전의 가중치가 함께 바뀌고 blob이 digest와 달라진다.
+    가중치는 항상 새 파일로 쓴 뒤 교체해야 한다. reflink 볼륨에서는 이 문제가 없다.
+
+    Args:
+        digest (str): blob digest
+        dest_path (str): 연결할 경로 (예: {version_path}/weights/best.pt)
+    """
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+    with store_lock:
+        release(dest_path)
+        try:
+            reflink(blob_path(digest), dest_path)
+            # reflink 복제본은 blob의 링크가 아니므로 참조 표시 파일로 blob을 붙잡아 둔다
+            os.link(blob_path(digest), ref_path(dest_path))
+        except OSError as e:
+            logger.info(f"[WEIGHTS] reflink 불가({e}), 하드 링크로 연결합니다: {dest_path}")
+            release(dest_path)
+            os.link(blob_path(digest), dest_path)
+
+
+def promote(src_path: str, dest_path: str) -> str:
+    """
+    학습 결과 가중치를 저장소에 넣고 버전 폴더에 연결한다. (/stop 의 shutil.move 대체)
+    reflink와 하드 링크를 모두 지원하지 않는 볼륨이면 저장소를 거치지 않고 기존처럼 파일을 옮긴다.
+
+    Args:
+        src_path (str): 학습 결과 가중치 경로
+        dest_path (str): 버전 폴더 내 weights 경로
+
+    Returns:
+        str: blob digest
+    """
+    # 해시는 오래 걸리므로 잠금 밖에서 계산한다
+    digest = hash_file(src_path)
+
+    # 저장과 링크 사이에 gc()가 끼어들어 새 blob을 지우지 않도록 한 번에 잠근다
+    with store_lock:
+        blob = store_blob(src_path, digest)
+        try:
+            materialize(digest, dest_path)
+        except OSError as e:
+            # 링크를 못 거는 볼륨에서는 blob을 공유할 수 없으므로 파일 하나만 남긴다
+            logger.warning(f"[WEIGHTS] 링크 실패({e}), blob을 weights 폴더로 옮깁니다: {dest_path}")
+            os.chmod(blob, 0o644)
+            shutil.move(blob, dest_path)
+
+    return digest
+
+
+def release(dest_path: str):
+    """
+    버전 폴더의 weights 파일(과 참조 표시 파일)을 제거한다. blob 자체는 gc()에서 참조가 없을 때만 지운다.
+    """
+    with store_lock:
+        for path in (dest_path, ref_path(dest_path)):
+            if os.path.lexists(path):
+                os.remove(path)
+
+
+def gc() -> int:
+    """
+    어떤 버전에서도 참조하지 않는 blob을 삭제한다.
+
+    Returns:
+        int: 삭제된 blob 수
+    """
+    removed = 0
+    if not os.path.exists(BLOB_STORE_PATH):
+        return removed
+
+    with store_lock:
+        for shard in os.listdir(BLOB_STORE_PATH):
+            shard_path = f"{BLOB_STORE_PATH}/{shard}"
+            for digest in os.listdir(shard_path):
+                path = f"{shard_path}/{digest}"
+                if os.stat(path).st_nlink <= 1:
+                    os.chmod(path, 0o644)
+                    os.remove(path)
+                    removed += 1
+                    logger.info(f"[WEIGHTS] 참조 없는 blob 삭제: {digest}")
+
+    return removed
+
+
+def delete_weights(weights_path: str) -> dict:
+    """
+    버전의 weights 폴더를 지우고, 더 이상 참조되지 않는 blob을 정리한다.
+
+    Args:
+        weights_path (str): {version_path}/weights
+
+    Returns:
+        dict: 지운 파일 수와 정리된 blob 수
+    """
+    released = 0
+    if os.path.isdir(weights_path):
+        for name in os.listdir(weights_path):
+            path = f"{weights_path}/{name}"
+            if name.endswith(BLOB_REF_SUFFIX):
+                continue
+            if os.path.isfile(path):
+                release(path)
+                released += 1
+        shutil.rmtree(weights_path, ignore_errors=True)
+
+    return {"released": released, "collected": gc()}